@@ -54,8 +54,10 @@ CREATE TABLE Orders (
     status VARCHAR(50) DEFAULT 'Pending',
     quantity INT CHECK (quantity > 0),
     pickup_time DATETIME,
+    total_amount DECIMAL(10,2) NOT NULL DEFAULT 0 CHECK (total_amount >= 0),
     customer_id VARCHAR(20),
     shop_id VARCHAR(10),
+    INDEX idx_orders_time (order_time),
     FOREIGN KEY (customer_id) REFERENCES Customer(customer_id)
         ON DELETE CASCADE,
     FOREIGN KEY (shop_id) REFERENCES Shop(shop_ID)
@@ -66,6 +68,7 @@ CREATE TABLE Order_Menu_Item (
     order_id VARCHAR(20),
     item_id VARCHAR(10),
     quantity INT NOT NULL CHECK (quantity > 0),
+    unit_price DECIMAL(6,2) NOT NULL CHECK (unit_price > 0),
     PRIMARY KEY (order_id, item_id),
     FOREIGN KEY (order_id) REFERENCES Orders(order_id)
         ON DELETE CASCADE,
@@ -78,6 +81,7 @@ CREATE TABLE Payment (
     mode VARCHAR(50) CHECK (mode IN ('Cash', 'UPI', 'Card', 'Online')),
     pstatus VARCHAR(50) CHECK (pstatus IN ('Success', 'Pending', 'Failed')),
     order_id VARCHAR(20) UNIQUE,
+    INDEX idx_payment_time (timestamp),
     FOREIGN KEY (order_id) REFERENCES Orders(order_id)
         ON DELETE CASCADE
 );
@@ -105,6 +109,35 @@ CREATE TABLE Notification (
         ON DELETE CASCADE
 );
 
+CREATE TABLE Low_Stock_Alert (
+    inventory_id VARCHAR(10) PRIMARY KEY,
+    item_name VARCHAR(100) NOT NULL,
+    quantity INT NOT NULL,
+    reorder_level INT NOT NULL,
+    is_open BOOLEAN NOT NULL DEFAULT TRUE,
+    raised_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    resolved_at DATETIME,
+    INDEX idx_open_alerts (is_open, raised_at),
+    FOREIGN KEY (inventory_id) REFERENCES Inventory(inventory_id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE Task_Outbox (
+    task_id VARCHAR(40) PRIMARY KEY,
+    event VARCHAR(50) NOT NULL,
+    hook VARCHAR(150) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'Pending' CHECK (status IN ('Pending', 'Failed')),
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL,
+    lease_id VARCHAR(32),
+    claimed_until DATETIME,
+    last_error VARCHAR(255),
+    created_at DATETIME NOT NULL,
+    INDEX idx_outbox_due (status, next_attempt_at)
+);
+
 
 --TRIGGERS
 --Auto Notification When Order is Ready
@@ -122,14 +155,45 @@ DELIMITER ;
 
 
 --Auto Check for Low Inventory
+--Keeps one Low_Stock_Alert per inventory item: it opens (with a single Notification)
+--when stock drops to the reorder level, is updated in place while stock stays low,
+--and is closed, re-arming it, once the item is restocked above the reorder level.
 DELIMITER //
 CREATE TRIGGER CheckReorderLevel
 AFTER UPDATE ON Inventory
 FOR EACH ROW
 BEGIN
-    IF NEW.quantity <= NEW.reorder_level THEN
+    IF NEW.quantity <= NEW.reorder_level AND OLD.quantity > OLD.reorder_level THEN
+        INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+        VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+        ON DUPLICATE KEY UPDATE
+            item_name = NEW.item_name,
+            quantity = NEW.quantity,
+            reorder_level = NEW.reorder_level,
+            is_open = TRUE,
+            raised_at = NOW(),
+            updated_at = NOW(),
+            resolved_at = NULL;
         INSERT INTO Notification (notification_id, message, generated_at, is_read)
-        VALUES (CONCAT('N', UUID()), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+        VALUES (CONCAT('N', LEFT(REPLACE(UUID(), '-', ''), 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+    ELSEIF NEW.quantity <= NEW.reorder_level THEN
+        IF NEW.quantity <> OLD.quantity OR NEW.reorder_level <> OLD.reorder_level THEN
+            INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+            VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+            ON DUPLICATE KEY UPDATE
+                quantity = NEW.quantity,
+                reorder_level = NEW.reorder_level,
+                updated_at = NOW();
+            -- ROW_COUNT() is 1 only when the item had no alert yet (stock was loaded already low)
+            IF ROW_COUNT() = 1 THEN
+                INSERT INTO Notification (notification_id, message, generated_at, is_read)
+                VALUES (CONCAT('N', LEFT(REPLACE(UUID(), '-', ''), 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+            END IF;
+        END IF;
+    ELSEIF OLD.quantity <= OLD.reorder_level THEN
+        UPDATE Low_Stock_Alert
+        SET quantity = NEW.quantity, is_open = FALSE, updated_at = NOW(), resolved_at = NOW()
+        WHERE inventory_id = NEW.inventory_id AND is_open = TRUE;
     END IF;
 END //
 DELIMITER ;
@@ -143,11 +207,10 @@ RETURNS DECIMAL(10,2)
 DETERMINISTIC
 BEGIN
     DECLARE total DECIMAL(10,2);
-    SELECT SUM(m.price * o.quantity)
+    SELECT total_amount
     INTO total
-    FROM Order_Menu_Item o
-    JOIN Menu_Item m ON o.item_id = m.item_ID
-    WHERE o.order_id = p_order_id;
+    FROM Orders
+    WHERE order_id = p_order_id;
     RETURN IFNULL(total, 0);
 END //
 DELIMITER ;
@@ -198,8 +261,8 @@ END //
 DELIMITER ;
 
 --QUERIES
-INSERT INTO Orders (order_id, order_time, status, quantity, customer_id, shop_id) VALUES (%s, %s, %s, %s, %s, %s)
-INSERT INTO Order_Menu_Item (order_id, item_id, quantity) VALUES (%s, %s, %s)
+INSERT INTO Orders (order_id, order_time, status, quantity, total_amount, customer_id, shop_id) VALUES (%s, %s, %s, %s, %s, %s, %s)
+INSERT INTO Order_Menu_Item (order_id, item_id, quantity, unit_price) VALUES (%s, %s, %s, %s)
 INSERT INTO Payment (payment_id, timestamp, mode, pstatus, order_id) VALUES (%s, %s, %s, %s, %s)
 INSERT INTO Kitchen_Status (prep_id, current_status, start_time, order_id) VALUES (%s, %s, %s, %s)
 
@@ -242,7 +305,7 @@ SELECT
             P.mode as payment_mode,
             P.pstatus as payment_status,
             GROUP_CONCAT(CONCAT(MI.item_name, ' x', OMI.quantity) SEPARATOR ', ') as order_items,
-            SUM(MI.price * OMI.quantity) as total_amount
+            O.total_amount
         FROM 
             Orders O
         JOIN 
@@ -259,7 +322,7 @@ SELECT
             O.customer_id = %s
             AND O.order_time >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
         GROUP BY 
-            O.order_id, O.order_time, O.status, O.quantity,
+            O.order_id, O.order_time, O.status, O.quantity, O.total_amount,
             S.shop_name, S.location, KS.current_status, 
             KS.start_time, KS.end_time, P.mode, P.pstatus
         ORDER BY 
@@ -366,15 +429,13 @@ SELECT
             S.shop_name, 
             COUNT(DISTINCT O.order_id) AS total_orders, 
             SUM(OMI.quantity) AS total_items_sold,
-            SUM(MI.price * OMI.quantity) AS gross_revenue
+            SUM(OMI.unit_price * OMI.quantity) AS gross_revenue
         FROM 
             Orders O
         JOIN 
             Shop S ON O.shop_id = S.shop_ID
         JOIN 
             Order_Menu_Item OMI ON O.order_id = OMI.order_id
-        JOIN 
-            Menu_Item MI ON OMI.item_id = MI.item_ID
         GROUP BY 
             S.shop_name
         ORDER BY 
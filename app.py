@@ -1,12 +1,34 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, g, Response, stream_with_context, send_from_directory, has_app_context
 import pymysql
 import mysql.connector
 import os
 from dotenv import load_dotenv
 import uuid
+import contextlib
+import random
+import statistics
+import csv
+import io
+import json
+import gzip
+import hashlib
+import hmac
+import mimetypes
+import re
+from decimal import Decimal
 from datetime import datetime, timedelta
+import functools
+import itertools
+import threading
+import time
 import logging
 import traceback
+import click
+
+from cache import create_cache
+from db_profiler import QueryProfile, ProfiledConnection
+from storage import create_storage
+from tasks import TaskQueue
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -17,66 +39,407 @@ app = Flask(__name__)
 app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
 
 
-def get_db_connection_pymysql():
+# DATABASE ROUTING
+#
+# Writes always go to the primary in DB_HOST. Routes tagged with @db_route
+# ('read_only' or 'read_after_write') may be served by one of the replicas
+# listed in DB_REPLICA_HOSTS (comma separated host[:port]), as long as the
+# replica is not lagging more than DB_REPLICA_MAX_LAG seconds behind.
+
+# STORAGE_BACKEND picks MySQL (default) or the embedded SQLite database, see storage.py
+storage = create_storage(
+    user=os.getenv('DB_USER', 'root'),
+    password=os.getenv('DB_PASSWORD', 'apoorva28'),
+    database=os.getenv('DB_NAME', 'pesu_food_systems'),
+    pool_size=int(os.getenv('DB_POOL_SIZE', '5')),
+    pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+    connect_timeout=int(os.getenv('DB_CONNECT_TIMEOUT', '3')),
+    read_timeout=int(os.getenv('DB_READ_TIMEOUT', '30')),
+    breaker_threshold=int(os.getenv('DB_BREAKER_THRESHOLD', '5')),
+    breaker_reset_timeout=float(os.getenv('DB_BREAKER_RESET_TIMEOUT', '30'))
+)
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '2'))
+DB_READ_AFTER_WRITE_WINDOW = float(os.getenv('DB_READ_AFTER_WRITE_WINDOW', '10'))
+LAST_WRITE_COOKIE = 'db_last_write'
+
+# Shared cache for menu, staff and active-order reads (see cache.py for CACHE_URL)
+cache = create_cache(
+    os.getenv('CACHE_URL', 'memory://'),
+    default_ttl=int(os.getenv('CACHE_DEFAULT_TTL', '30')),
+    local_ttl=int(os.getenv('CACHE_LOCAL_TTL', '2')),
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+)
+MENU_CACHE_TTL = int(os.getenv('MENU_CACHE_TTL', '60'))
+STAFF_CACHE_TTL = int(os.getenv('STAFF_CACHE_TTL', '300'))
+ACTIVE_ORDERS_CACHE_TTL = int(os.getenv('ACTIVE_ORDERS_CACHE_TTL', '10'))
+
+
+@app.before_request
+def start_cache_listener():
+    """Listens for other workers' invalidations; started per process, after any fork."""
+    cache.start()
+
+
+# Background workers for after-commit hooks (see tasks.py and BACKGROUND TASKS below)
+task_queue = TaskQueue(
+    lambda: get_db_connection(route='write'),
+    workers=int(os.getenv('TASK_WORKERS', '2')),
+    max_queue=int(os.getenv('TASK_QUEUE_SIZE', '1000')),
+    max_attempts=int(os.getenv('TASK_MAX_ATTEMPTS', '5')),
+    backoff=float(os.getenv('TASK_RETRY_BACKOFF', '2')),
+    poll_interval=float(os.getenv('TASK_POLL_INTERVAL', '2'))
+)
+
+
+def _parse_db_host(spec):
+    """Splits 'host[:port]' into a (host, port) tuple."""
+    host, _, port = spec.strip().partition(':')
+    return host, int(port) if port else int(os.getenv('DB_PORT', '3306'))
+
+
+DB_PRIMARY = _parse_db_host(os.getenv('DB_HOST', 'localhost'))
+DB_REPLICAS = [_parse_db_host(spec) for spec in os.getenv('DB_REPLICA_HOSTS', '').split(',') if spec.strip()]
+if not storage.supports_replicas:
+    DB_REPLICAS = []
+
+_replica_cycle = itertools.cycle(DB_REPLICAS) if DB_REPLICAS else None
+_replica_lag = {}  # (host, port) -> (checked_at, lag_seconds or None)
+
+
+def db_route(mode):
     """
-    PyMySQL connection (used for Phase 1 - Enhanced ordering)
+    Tags a view with how its reads may be routed:
+      'read_only'        - safe to serve from any healthy replica
+      'read_after_write' - replica, unless this client wrote recently
+      'write'            - always the primary (also the default for untagged views)
     """
+    if mode not in ('read_only', 'read_after_write', 'write'):
+        raise ValueError(f'Unknown db route mode: {mode}')
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            g.db_route = mode
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@app.after_request
+def remember_last_write(response):
+    """Marks clients that just wrote so their follow-up reads stay on the primary."""
+    if g.get('db_route') == 'write' and response.status_code < 400 and DB_REPLICAS:
+        response.set_cookie(LAST_WRITE_COOKIE, str(time.time()),
+                            max_age=int(DB_READ_AFTER_WRITE_WINDOW), httponly=True)
+    return response
+
+
+def _check_replica_lag(host, port):
+    """Returns the replica's lag in seconds, or None if it is not replicating."""
+    conn = storage.connect(host, port)
+    cursor = conn.cursor(dictionary=True)
     try:
-        return pymysql.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', 'apoorva28'),
-            database=os.getenv('DB_NAME', 'pesu_food_systems'),
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            # MySQL < 8.0.22 only understands the old syntax
+            cursor.execute("SHOW SLAVE STATUS")
+        status = cursor.fetchone()
+        if not status:
+            return None
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return float(lag) if lag is not None else None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _replica_is_healthy(replica):
+    """Lag guard: a replica is usable only while it is within DB_REPLICA_MAX_LAG."""
+    if DB_REPLICA_MAX_LAG < 0:
+        return True
+
+    checked_at, lag = _replica_lag.get(replica, (0, None))
+    if time.monotonic() - checked_at > DB_REPLICA_LAG_CHECK_INTERVAL:
+        try:
+            lag = _check_replica_lag(*replica)
+        except mysql.connector.Error as err:
+            print(f"Replica Lag Check Error ({replica[0]}:{replica[1]}): {err}")
+            lag = None
+        _replica_lag[replica] = (time.monotonic(), lag)
+
+    return lag is not None and lag <= DB_REPLICA_MAX_LAG
+
+
+def _wrote_recently():
+    """True if the current client made a write within DB_READ_AFTER_WRITE_WINDOW."""
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < DB_READ_AFTER_WRITE_WINDOW
+
+
+def choose_db_host(route=None):
+    """Picks the (host, port) to use for the given route mode, defaulting to the current view's tag."""
+    if route is None:
+        route = g.get('db_route', 'write')
+
+    if not DB_REPLICAS or route == 'write':
+        return DB_PRIMARY
+    if route == 'read_after_write' and _wrote_recently():
+        return DB_PRIMARY
+
+    for _ in range(len(DB_REPLICAS)):
+        replica = next(_replica_cycle)
+        if _replica_is_healthy(replica):
+            return replica
+
+    # Every replica is lagging or down, fall back to the primary
+    return DB_PRIMARY
+
+
+# QUERY PROFILING
+#
+# Set DB_PROFILE_TOKEN and send "X-Profile-DB: <token>" to profile a single request,
+# or set DB_PROFILE=1 to profile everything. Without a token the header is ignored, so
+# a default install never reveals query counts and timings. The response gets
+# X-DB-Query-Count and Server-Timing headers, the per-statement breakdown is logged,
+# N+1 patterns are flagged and slow SELECTs are EXPLAINed after the response is sent.
+
+DB_PROFILE = os.getenv('DB_PROFILE', '0') == '1'
+DB_PROFILE_TOKEN = os.getenv('DB_PROFILE_TOKEN')
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '200'))
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv('DB_N_PLUS_ONE_THRESHOLD', '3'))
+PROFILE_HEADER = 'X-Profile-DB'
+
+
+@app.before_request
+def start_db_profile():
+    header = request.headers.get(PROFILE_HEADER)
+    by_header = bool(DB_PROFILE_TOKEN and header) and hmac.compare_digest(header.encode(), DB_PROFILE_TOKEN.encode())
+    if DB_PROFILE or by_header:
+        g.db_profile = QueryProfile(DB_SLOW_QUERY_MS, DB_N_PLUS_ONE_THRESHOLD)
+
+
+def _explain_slow_queries(slow_queries):
+    """Logs the EXPLAIN plan of each slow SELECT. Runs after the response has been sent."""
+    connection = get_db_connection_pymysql(route='read_only')
+    if not connection:
+        return
+    try:
+        cursor = connection.cursor()
+        for sql, params, elapsed_ms in slow_queries:
+            cursor.execute('EXPLAIN ' + sql, params)
+            app.logger.warning("Slow query (%.1f ms): %s\nEXPLAIN: %s", elapsed_ms, ' '.join(sql.split()), cursor.fetchall())
+    except Exception as err:
+        app.logger.warning("EXPLAIN failed: %s", err)
+    finally:
+        connection.close()
+
+
+@app.after_request
+def finish_db_profile(response):
+    profile = g.pop('db_profile', None)
+    if profile is None:
+        return response
+
+    report = profile.report()
+    response.headers['X-DB-Query-Count'] = str(report['query_count'])
+    response.headers['Server-Timing'] = f"db;desc=\"{report['query_count']} queries\";dur={report['total_db_ms']}"
+
+    app.logger.info("DB profile %s %s: %d queries, %.2f ms", request.method, request.path,
+                    report['query_count'], report['total_db_ms'])
+    for statement in report['statements']:
+        app.logger.info("  %3dx %8.2f ms  %s", statement['count'], statement['total_ms'], statement['sql'])
+    for statement in report['n_plus_one']:
+        app.logger.warning("Possible N+1 in %s %s: %d x %s", request.method, request.path,
+                           statement['count'], statement['sql'])
+
+    slow_selects = [q for q in profile.slow_queries if q[0].lstrip().upper().startswith('SELECT')]
+    if slow_selects:
+        response.call_on_close(lambda: _explain_slow_queries(slow_selects))
+    return response
+
+
+def _profiled(connection):
+    """Wraps a connection for the current request's profile, if one is running."""
+    profile = g.get('db_profile') if has_app_context() else None
+    if connection and profile:
+        return ProfiledConnection(connection, profile)
+    return connection
+
+
+def _connect_with_fallback(route, connect):
+    """
+    Connects to the host chosen for the route. The replica lag check can be a few
+    seconds old, so a replica that fails to connect falls back to the primary and is
+    skipped until its next lag check.
+    """
+    host = choose_db_host(route)
+    try:
+        return connect(*host)
+    except (mysql.connector.Error, pymysql.err.Error, OSError) as err:
+        if host == DB_PRIMARY:
+            raise
+        print(f"Replica Connection Error ({host[0]}:{host[1]}), falling back to the primary: {err}")
+        _replica_lag[host] = (time.monotonic(), None)
+        return connect(*DB_PRIMARY)
+
+
+def get_db_connection_pymysql(route=None, cursorclass=pymysql.cursors.DictCursor):
+    """
+    PyMySQL connection (used for Phase 1 - Enhanced ordering).
+    Pass cursorclass=pymysql.cursors.SSDictCursor for unbuffered, row-at-a-time reads.
+    """
+    unbuffered = issubclass(cursorclass, pymysql.cursors.SSCursor)
+    try:
+        return _profiled(_connect_with_fallback(
+            route, lambda host, port: storage.connect_dict(host, port, unbuffered=unbuffered)
+        ))
     except Exception as err:
         print(f"PyMySQL Connection Error: {err}")
         return None
 
-def get_db_connection():
+def get_db_connection(route=None):
     """
-    MySQL Connector connection (used for Phase 2 - Admin features)
+    MySQL Connector connection (used for Phase 2 - Admin features).
+    With MySQL, connections come from a per-host pool; close() hands them back.
     """
     try:
-        conn = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', 'apoorva28'),
-            database=os.getenv('DB_NAME', 'pesu_food_systems')
-        )
-        return conn
+        return _profiled(_connect_with_fallback(route, storage.connect))
     except mysql.connector.Error as err:
         print(f"MySQL Connector Connection Error: {err}")
         return None
 
 
+# STATIC ASSETS AND PAGE CACHE
+#
+# Files in static/ are served under content-hashed names (style.3f2a9c1b0d4e.css)
+# with a one year immutable Cache-Control, and text files are gzipped once at
+# startup. The HTML pages have no per-request data, so each one is rendered once
+# and then answered from memory with an ETag, letting browsers revalidate with a 304.
+# Both caches are skipped in debug mode so template and asset edits show up immediately.
+
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+_assets = None  # (manifest: name -> hashed name, entries: hashed name -> cache entry)
+_assets_lock = threading.Lock()
+_page_cache = {}
+
+
+def _cache_entry(body, mimetype):
+    """Holds a response body with its precompressed variant and ETag."""
+    compressed = None
+    if mimetype.startswith(COMPRESSIBLE_TYPES):
+        compressed = gzip.compress(body, compresslevel=9)
+        if len(compressed) >= len(body):
+            compressed = None
+    return {
+        'body': body,
+        'gzip': compressed,
+        'etag': hashlib.sha256(body).hexdigest()[:16],
+        'mimetype': mimetype,
+    }
+
+
+def _get_assets():
+    """Fingerprints every file under static/ on first use."""
+    global _assets
+    if _assets is None:
+        with _assets_lock:
+            if _assets is None:
+                manifest, entries = {}, {}
+                for root, _, files in os.walk(app.static_folder):
+                    for name in files:
+                        path = os.path.join(root, name)
+                        filename = os.path.relpath(path, app.static_folder).replace(os.sep, '/')
+                        with open(path, 'rb') as f:
+                            body = f.read()
+                        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                        entry = _cache_entry(body, mimetype)
+                        base, ext = os.path.splitext(filename)
+                        hashed = f"{base}.{entry['etag'][:12]}{ext}"
+                        manifest[filename] = hashed
+                        entries[hashed] = entry
+                _assets = (manifest, entries)
+    return _assets
+
+
+def _cached_response(entry, cache_control):
+    """Builds a (possibly gzipped) response for a cache entry, answering 304 when the ETag matches."""
+    use_gzip = entry['gzip'] is not None and request.accept_encodings['gzip']
+    response = Response(entry['gzip'] if use_gzip else entry['body'], mimetype=entry['mimetype'])
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    if entry['gzip'] is not None:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(entry['etag'] + ('-gz' if use_gzip else ''))
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    """Makes url_for('static', filename=...) point at the content-hashed file name."""
+    if endpoint == 'static' and not app.debug:
+        hashed = _get_assets()[0].get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+
+
+def serve_static(filename):
+    """Serves fingerprinted assets from memory; plain names fall back to Flask's file serving."""
+    entry = _get_assets()[1].get(filename)
+    if entry is None:
+        return send_from_directory(app.static_folder, filename)
+    return _cached_response(entry, f'public, max-age={ASSET_MAX_AGE}, immutable')
+
+app.view_functions['static'] = serve_static
+
+
+def render_cached_page(template_name):
+    """Renders a static page once and serves it from memory afterwards."""
+    if app.debug:
+        return render_template(template_name)
+
+    entry = _page_cache.get(template_name)
+    if entry is None:
+        body = render_template(template_name).encode('utf-8')
+        entry = _page_cache[template_name] = _cache_entry(body, 'text/html')
+    return _cached_response(entry, 'no-cache')
+
+
 @app.route('/')
 def home():
     """Serves the login page as the entry point."""
-    return render_template('login.html')
+    return render_cached_page('login.html')
 
 @app.route('/order-page')
 def customer_page():
     """Serves the customer ordering page (Phase 1)."""
-    return render_template('customer_order_page.html')
+    return render_cached_page('customer_order_page.html')
 
 @app.route('/my-orders')
 def my_orders_page():
     """Serves the customer order tracking page."""
-    return render_template('customer_orders.html')
+    return render_cached_page('customer_orders.html')
 
 @app.route('/admin-dashboard')
 def admin_page():
     """Serves the admin dashboard page (Phase 2)."""
-    return render_template('admin_dashboard.html')
+    return render_cached_page('admin_dashboard.html')
 
 @app.route('/kitchen-dashboard')
 def kitchen():
     """Serves the kitchen management page."""
-    return render_template('kitchen_dashboard.html')
+    return render_cached_page('kitchen_dashboard.html')
 
 
 @app.route('/api/login', methods=['POST'])
+@db_route('read_only')
 def api_login():
     """Handles user login and determines the user's role (Customer, Admin, or Kitchen)."""
     user_id = request.json.get('user_id')
@@ -123,176 +486,222 @@ def api_login():
 
 
 @app.route('/place_order', methods=['POST'])
+@db_route('write')
 def place_order():
     """
-    Enhanced endpoint with complete order details
+    Enhanced endpoint with complete order details.
+    The cart may hold items from several shops: items are grouped by the shop that
+    sells them and each shop gets its own Orders, Payment and Kitchen_Status rows,
+    written over one connection with one menu lookup and a single commit.
     """
     try:
-        print("🎯 DEBUG: Enhanced place_order function started")
-        
-        
         data = request.get_json()
-        print(f"📦 DEBUG: Received data: {data}")
         
     
         customer_id = data.get('customer_id')
-        shop_id = data.get('shop_id')
+        # Optional: the shop is taken from each item's menu entry
+        default_shop_id = data.get('shop_id')
         items = data.get('items', [])
         payment_mode = data.get('payment_mode', 'Online')
         
-        print(f"🔍 DEBUG: customer_id={customer_id}, shop_id={shop_id}, items_count={len(items)}, payment_mode={payment_mode}")
       
         valid_payment_modes = ['Cash', 'UPI', 'Card', 'Online', 'CASH', 'CARD']
         if payment_mode not in valid_payment_modes:
             return jsonify({'error': f'Invalid payment mode. Must be one of: {valid_payment_modes}'}), 400
         
-        if not customer_id or not shop_id or not items:
+        if not customer_id or not items:
             return jsonify({'error': 'Missing required fields'}), 400
         
-        print("🛢️ DEBUG: Attempting database connection...")
+        # Merge repeated lines for the same item, Order_Menu_Item is keyed by (order_id, item_id).
+        # Item IDs compare case-insensitively (MySQL collation), so merge on the upper-cased ID.
+        quantities = {}
+        spellings = set()
+        for item in items:
+            try:
+                quantity = int(item['quantity'])
+            except (KeyError, TypeError, ValueError):
+                quantity = 0
+            if not isinstance(item.get('item_ID'), str) or not item['item_ID'] or quantity <= 0:
+                return jsonify({'error': 'Each item needs an item_ID and a positive quantity'}), 400
+            spellings.add(item['item_ID'])
+            quantities[item['item_ID'].upper()] = quantities.get(item['item_ID'].upper(), 0) + quantity
+        
         connection = get_db_connection_pymysql()
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
         cursor = connection.cursor()
-        print(" DEBUG: Database connection successful")
-       
-        order_id = 'O' + str(uuid.uuid4().hex[:7]).upper()
-        payment_id = 'TXN' + str(uuid.uuid4().hex[:7]).upper()
-        prep_id = 'PREP' + str(uuid.uuid4().hex[:7]).upper()
-        
-        print(f" DEBUG: Generated order_id: {order_id}")
-        print(f" DEBUG: Generated transaction_id: {payment_id}")
-        
-        total_quantity = sum(item['quantity'] for item in items)
-        total_preparation_time = 0
-        order_details = []
-        total_amount = 0
-        
-        print(" DEBUG: Calculating order details...")
-        for i, item in enumerate(items):
-        
-            cursor.execute(
-                "SELECT item_name, price, countdown FROM Menu_Item WHERE item_ID = %s",
-                (item['item_ID'],)
-            )
-            item_data = cursor.fetchone()
+        
+        # One lookup for the whole cart instead of one query per item
+        placeholders = ', '.join(['%s'] * len(spellings))
+        cursor.execute(
+            f"SELECT item_ID, item_name, price, countdown, shop_ID FROM Menu_Item WHERE item_ID IN ({placeholders})",
+            list(spellings)
+        )
+        menu = {row['item_ID'].upper(): row for row in cursor.fetchall()}
+        
+        order_time = datetime.now()
+        shop_orders = {}
+        
+        for item_id, quantity in quantities.items():
+            item_data = menu.get(item_id)
+            if not item_data:
+                print(f"    ERROR: Item {item_id} not found in Menu_Item")
+                connection.close()
+                return jsonify({'error': f'Item {item_id} not found in menu'}), 400
             
-            if item_data:
-                item_name = item_data['item_name']
-                item_price = item_data['price']
-                item_countdown = item_data['countdown']
-                item_total = item_price * item['quantity']
-                preparation_time = item_countdown * item['quantity']
-                
-                total_amount += item_total
-                total_preparation_time += preparation_time
-                
-                order_details.append({
-                    'item_id': item['item_ID'],
-                    'item_name': item_name,
-                    'quantity': item['quantity'],
-                    'unit_price': float(item_price),
-                    'total_price': float(item_total),
-                    'preparation_time_per_unit': item_countdown,
-                    'total_preparation_time': preparation_time
-                })
-                
-                print(f"    Item {i+1}: {item_name} x {item['quantity']} = ₹{item_total} | Prep: {preparation_time}min")
-            else:
-                print(f"    ERROR: Item {item['item_ID']} not found in Menu_Item")
+            shop_id = item_data['shop_ID'] or default_shop_id
+            if not shop_id:
                 connection.close()
-                return jsonify({'error': f'Item {item["item_ID"]} not found in menu'}), 400
+                return jsonify({'error': f"Item {item_data['item_ID']} has no shop, pass a shop_id"}), 400
+            if shop_id not in shop_orders:
+                shop_orders[shop_id] = {
+                    'order_id': 'O' + str(uuid.uuid4().hex[:7]).upper(),
+                    'payment_id': 'TXN' + str(uuid.uuid4().hex[:7]).upper(),
+                    'prep_id': 'PREP' + str(uuid.uuid4().hex[:7]).upper(),
+                    'shop_id': shop_id,
+                    'total_quantity': 0,
+                    'total_amount': 0,
+                    'total_preparation_time': 0,
+                    'items': [],
+                }
+            order = shop_orders[shop_id]
+            
+            item_price = item_data['price']
+            item_total = item_price * quantity
+            preparation_time = item_data['countdown'] * quantity
+            
+            order['total_quantity'] += quantity
+            order['total_amount'] += item_total
+            order['total_preparation_time'] += preparation_time
+            order['items'].append({
+                'item_id': item_data['item_ID'],
+                'item_name': item_data['item_name'],
+                'quantity': quantity,
+                'unit_price': float(item_price),
+                'total_price': float(item_total),
+                'preparation_time_per_unit': item_data['countdown'],
+                'total_preparation_time': preparation_time
+            })
         
-        print(f" DEBUG: Total preparation time: {total_preparation_time} minutes")
-        print(f" DEBUG: Total order amount: ₹{total_amount}")
+        orders = list(shop_orders.values())
         
         # Start transaction
         connection.begin()
         
         # 1. Insert into Orders table FIRST
-        print(" DEBUG: Inserting into Orders table...")
-        cursor.execute(
-            "INSERT INTO Orders (order_id, order_time, status, quantity, customer_id, shop_id) VALUES (%s, %s, %s, %s, %s, %s)",
-            (order_id, datetime.now(), 'Pending', total_quantity, customer_id, shop_id)
+        cursor.executemany(
+            "INSERT INTO Orders (order_id, order_time, status, quantity, total_amount, customer_id, shop_id) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(o['order_id'], order_time, 'Pending', o['total_quantity'], o['total_amount'], customer_id, o['shop_id']) for o in orders]
         )
-        print(" DEBUG: Order inserted successfully")
-        
-        # 2. Insert order items AFTER order is created
-        print(" DEBUG: Inserting order items...")
-        for i, item in enumerate(items):
-            cursor.execute(
-                "INSERT INTO Order_Menu_Item (order_id, item_id, quantity) VALUES (%s, %s, %s)",
-                (order_id, item['item_ID'], item['quantity'])
-            )
-            print(f"    Added {item['item_ID']} x {item['quantity']}")
-        print(" DEBUG: All order items inserted")
         
-        # 3. Create payment record
-        print(" DEBUG: Creating payment record...")
-        cursor.execute(
+        # 2. Insert order items AFTER order is created, keeping the price paid
+        cursor.executemany(
+            "INSERT INTO Order_Menu_Item (order_id, item_id, quantity, unit_price) VALUES (%s, %s, %s, %s)",
+            [(o['order_id'], i['item_id'], i['quantity'], i['unit_price']) for o in orders for i in o['items']]
+        )
+        
+        # 3. Create payment records
+        cursor.executemany(
             "INSERT INTO Payment (payment_id, timestamp, mode, pstatus, order_id) VALUES (%s, %s, %s, %s, %s)",
-            (payment_id, datetime.now(), payment_mode, 'Pending', order_id)
+            [(o['payment_id'], order_time, payment_mode, 'Pending', o['order_id']) for o in orders]
         )
-        print(" DEBUG: Payment record created")
         
         # 4. Create kitchen status
-        print(" DEBUG: Creating kitchen status...")
         kitchen_status = 'Preparing'
-        cursor.execute(
+        cursor.executemany(
             "INSERT INTO Kitchen_Status (prep_id, current_status, start_time, order_id) VALUES (%s, %s, %s, %s)",
-            (prep_id, kitchen_status, datetime.now(), order_id)
+            [(o['prep_id'], kitchen_status, order_time, o['order_id']) for o in orders]
         )
-        print(" DEBUG: Kitchen status created")
         
-        # Calculate estimated ready time
-        order_time = datetime.now()
-        estimated_ready_time = order_time + timedelta(minutes=total_preparation_time)
+        # 5. Record the follow-up work in the same transaction, it runs after the response
+        tasks = task_queue.add_to_outbox(cursor, 'order_placed', {
+            'customer_id': customer_id,
+            'payment_mode': payment_mode,
+            'order_time': order_time,
+            'orders': [{
+                'order_id': o['order_id'],
+                'shop_id': o['shop_id'],
+                'payment_id': o['payment_id'],
+                'prep_id': o['prep_id'],
+                'total_amount': float(o['total_amount']),
+                'total_quantity': o['total_quantity'],
+                'items': o['items'],
+            } for o in orders],
+        })
         
         # COMMIT ALL TRANSACTIONS TOGETHER
-        print(" DEBUG: Committing all transactions...")
         connection.commit()
-        print(" DEBUG: All transactions committed successfully")
+        cache.invalidate('active-orders:')
+        task_queue.dispatch(tasks)
         
         cursor.close()
         connection.close()
-        print(" DEBUG: Database connection closed")
         
-        # Prepare comprehensive response
-        response_data = {
-            'success': True,
-            'order_id': order_id,
-            'order_summary': {
-                'order_id': order_id,
-                'transaction_id': payment_id,
-                'customer_id': customer_id,
-                'shop_id': shop_id,
-                'order_time': order_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'status': 'Pending',
-                'kitchen_status': kitchen_status,
-                'preparation_id': prep_id
-            },
-            'payment_details': {
-                'payment_mode': payment_mode,
-                'payment_status': 'Pending',
-                'transaction_id': payment_id
-            },
-            'order_timing': {
-                'total_preparation_time_minutes': total_preparation_time,
-                'order_placed_at': order_time.strftime('%H:%M:%S'),
-                'estimated_ready_at': estimated_ready_time.strftime('%H:%M:%S'),
-                'countdown_timer': f"{total_preparation_time} minutes"
-            },
-            'financial_summary': {
-                'total_amount': float(total_amount),
-                'total_quantity': total_quantity,
-                'currency': 'INR'
-            },
-            'order_items': order_details,
-            'message': f'Order placed successfully! Your food will be ready in approximately {total_preparation_time} minutes.'
-        }
+        # Prepare comprehensive response, one entry per shop
+        order_responses = []
+        for o in orders:
+            estimated_ready_time = order_time + timedelta(minutes=o['total_preparation_time'])
+            order_responses.append({
+                'order_id': o['order_id'],
+                'order_summary': {
+                    'order_id': o['order_id'],
+                    'transaction_id': o['payment_id'],
+                    'customer_id': customer_id,
+                    'shop_id': o['shop_id'],
+                    'order_time': order_time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'status': 'Pending',
+                    'kitchen_status': kitchen_status,
+                    'preparation_id': o['prep_id']
+                },
+                'payment_details': {
+                    'payment_mode': payment_mode,
+                    'payment_status': 'Pending',
+                    'transaction_id': o['payment_id']
+                },
+                'order_timing': {
+                    'total_preparation_time_minutes': o['total_preparation_time'],
+                    'order_placed_at': order_time.strftime('%H:%M:%S'),
+                    'estimated_ready_at': estimated_ready_time.strftime('%H:%M:%S'),
+                    'countdown_timer': f"{o['total_preparation_time']} minutes"
+                },
+                'financial_summary': {
+                    'total_amount': float(o['total_amount']),
+                    'total_quantity': o['total_quantity'],
+                    'currency': 'INR'
+                },
+                'order_items': o['items']
+            })
+        
+        if len(order_responses) == 1:
+            response_data = {
+                'success': True,
+                'order_ids': [orders[0]['order_id']],
+                **order_responses[0],
+                'message': f"Order placed successfully! Your food will be ready in approximately {orders[0]['total_preparation_time']} minutes."
+            }
+        else:
+            # Shops cook in parallel, the cart is complete when the slowest shop is done
+            longest_preparation_time = max(o['total_preparation_time'] for o in orders)
+            response_data = {
+                'success': True,
+                'order_id': orders[0]['order_id'],
+                'order_ids': [o['order_id'] for o in orders],
+                'orders': order_responses,
+                'order_timing': {
+                    'total_preparation_time_minutes': longest_preparation_time,
+                    'order_placed_at': order_time.strftime('%H:%M:%S'),
+                    'estimated_ready_at': (order_time + timedelta(minutes=longest_preparation_time)).strftime('%H:%M:%S'),
+                    'countdown_timer': f"{longest_preparation_time} minutes"
+                },
+                'financial_summary': {
+                    'total_amount': float(sum(o['total_amount'] for o in orders)),
+                    'total_quantity': sum(o['total_quantity'] for o in orders),
+                    'currency': 'INR'
+                },
+                'message': f'{len(orders)} orders placed successfully, one per shop! Everything will be ready in approximately {longest_preparation_time} minutes.'
+            }
         
-        print("🎉 DEBUG: Order completed successfully with all details")
         return jsonify(response_data)
         
     except Exception as e:
@@ -312,9 +721,16 @@ def place_order():
 
 
 @app.route('/api/menu', methods=['GET'])
+@db_route('read_only')
 def get_menu():
     """Fetches and displays the entire menu from all shops, joining Menu_Item, Inventory, and Shop."""
-    db = get_db_connection()
+    menu_data = cache.get('menu:all')
+    if menu_data is not None:
+        return jsonify(menu_data)
+
+    # Fill the cache from the primary: an entry read from a lagging replica right
+    # after an invalidation would keep the old rows for the whole TTL
+    db = get_db_connection(route='write')
     if not db:
         return jsonify({'status': 'Failed', 'message': 'Database connection error'}), 500
     
@@ -353,7 +769,8 @@ def get_menu():
             item['available'] = bool(item['available']) if item['available'] is not None else False
             item['price'] = float(item['price']) if item['price'] else 0.0
             item['quantity'] = item['quantity'] if item['quantity'] is not None else 0
-            
+        
+        cache.set('menu:all', menu_data, MENU_CACHE_TTL)
         return jsonify(menu_data)
 
     except mysql.connector.Error as err:
@@ -364,10 +781,16 @@ def get_menu():
         db.close()
 
 @app.route('/menu_items/<shop_id>', methods=['GET'])
+@db_route('read_only')
 def get_menu_items(shop_id):
     """Get menu items for a specific shop (kept for backward compatibility)"""
+    menu_items = cache.get(f'menu:shop:{shop_id}')
+    if menu_items is not None:
+        return jsonify({'menu_items': menu_items})
+
     try:
-        connection = get_db_connection_pymysql()
+        # Cache fills read from the primary (see get_menu)
+        connection = get_db_connection_pymysql(route='write')
         if not connection:
             return jsonify({'error': 'Database connection failed'}), 500
         
@@ -387,6 +810,7 @@ def get_menu_items(shop_id):
             if item['price']:
                 item['price'] = float(item['price'])
         
+        cache.set(f'menu:shop:{shop_id}', menu_items, MENU_CACHE_TTL)
         return jsonify({'menu_items': menu_items})
         
     except Exception as e:
@@ -398,6 +822,7 @@ def get_menu_items(shop_id):
 
 # 1. API to get customer's active orders with status
 @app.route('/api/customer/my-orders/<customer_id>', methods=['GET'])
+@db_route('read_after_write')
 def get_customer_orders(customer_id):
     """
     Fetches all orders for a specific customer with their current status.
@@ -423,7 +848,7 @@ def get_customer_orders(customer_id):
             P.mode as payment_mode,
             P.pstatus as payment_status,
             GROUP_CONCAT(CONCAT(MI.item_name, ' x', OMI.quantity) SEPARATOR ', ') as order_items,
-            SUM(MI.price * OMI.quantity) as total_amount
+            O.total_amount
         FROM 
             Orders O
         JOIN 
@@ -440,7 +865,7 @@ def get_customer_orders(customer_id):
             O.customer_id = %s
             AND O.order_time >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
         GROUP BY 
-            O.order_id, O.order_time, O.status, O.quantity,
+            O.order_id, O.order_time, O.status, O.quantity, O.total_amount,
             S.shop_name, S.location, KS.current_status, 
             KS.start_time, KS.end_time, P.mode, P.pstatus
         ORDER BY 
@@ -491,6 +916,7 @@ def get_customer_orders(customer_id):
 
 # 2. API to get notification count for a customer
 @app.route('/api/customer/notifications/<customer_id>', methods=['GET'])
+@db_route('read_after_write')
 def get_customer_notifications(customer_id):
     """
     Get count of orders that are ready for pickup (notifications).
@@ -537,6 +963,7 @@ def get_customer_notifications(customer_id):
 
 # 3. API to mark order as picked up/completed
 @app.route('/api/customer/complete-order/<order_id>', methods=['POST'])
+@db_route('write')
 def complete_order(order_id):
     """
     Mark an order as completed/picked up.
@@ -555,11 +982,15 @@ def complete_order(order_id):
             WHERE order_id = %s;
         """
         cursor.execute(update_query, (order_id,))
-        db.commit()
-        
         if cursor.rowcount == 0:
             return jsonify({'status': 'Failed', 'message': 'Order not found'}), 404
         
+        tasks = task_queue.add_to_outbox(cursor, 'order_status_changed', {
+            'order_id': order_id, 'prep_id': None, 'status': 'Completed', 'changed_at': datetime.now()
+        })
+        db.commit()
+        task_queue.dispatch(tasks)
+        
         return jsonify({
             'status': 'Success',
             'message': 'Order marked as completed',
@@ -577,6 +1008,7 @@ def complete_order(order_id):
 # PHASE 2: ADMIN/REPORTS APIS
 
 @app.route('/api/kitchen/staff-info', methods=['GET'])
+@db_route('read_only')
 def get_kitchen_staff_info():
     """Fetches kitchen staff information including assigned shop."""
     staff_id = request.args.get('staff_id')
@@ -584,6 +1016,10 @@ def get_kitchen_staff_info():
     if not staff_id:
         return jsonify({'status': 'Failed', 'message': 'staff_id is required'}), 400
     
+    staff_info = cache.get(f'staff:{staff_id}')
+    if staff_info is not None:
+        return jsonify({'status': 'Success', **staff_info})
+    
     db = get_db_connection()
     if not db:
         return jsonify({'status': 'Failed', 'message': 'Database connection error'}), 500
@@ -612,6 +1048,7 @@ def get_kitchen_staff_info():
         staff_info = cursor.fetchone()
         
         if staff_info:
+            cache.set(f'staff:{staff_id}', staff_info, STAFF_CACHE_TTL)
             return jsonify({
                 'status': 'Success',
                 **staff_info
@@ -627,11 +1064,18 @@ def get_kitchen_staff_info():
         db.close()
 
 @app.route('/api/admin/active-orders', methods=['GET'])
+@db_route('read_after_write')
 def get_active_orders():
     """Fetches all active orders with kitchen status for the kitchen dashboard."""
     shop_id = request.args.get('shop_id')  
+    cache_key = f"active-orders:{shop_id or 'all'}"
     
-    db = get_db_connection()
+    orders_data = cache.get(cache_key)
+    if orders_data is not None:
+        return jsonify(orders_data)
+    
+    # Cache fills read from the primary (see get_menu)
+    db = get_db_connection(route='write')
     if not db:
         return jsonify({'status': 'Failed', 'message': 'Database connection error'}), 500
 
@@ -690,7 +1134,8 @@ def get_active_orders():
                 order['order_time'] = order['order_time'].strftime('%Y-%m-%d %H:%M:%S')
             if order['start_time']:
                 order['start_time'] = order['start_time'].strftime('%Y-%m-%d %H:%M:%S')
-            
+        
+        cache.set(cache_key, orders_data, ACTIVE_ORDERS_CACHE_TTL)
         return jsonify(orders_data)
 
     except mysql.connector.Error as err:
@@ -701,6 +1146,7 @@ def get_active_orders():
         db.close()
 
 @app.route('/api/admin/update-status', methods=['POST'])
+@db_route('write')
 def update_order_status():
     """Updates kitchen status to 'Ready' which triggers the NotifyOrderReady trigger."""
     data = request.json
@@ -724,11 +1170,16 @@ def update_order_status():
             WHERE prep_id = %s
         """
         cursor.execute(update_query, (new_status, prep_id))
-        db.commit()
-        
         if cursor.rowcount == 0:
             return jsonify({'status': 'Failed', 'message': 'prep_id not found'}), 404
         
+        tasks = task_queue.add_to_outbox(cursor, 'order_status_changed', {
+            'order_id': None, 'prep_id': prep_id, 'status': new_status, 'changed_at': datetime.now()
+        })
+        db.commit()
+        cache.invalidate('active-orders:')
+        task_queue.dispatch(tasks)
+        
         return jsonify({
             'status': 'Success', 
             'message': f'Order status updated to {new_status}. Notification triggered.',
@@ -745,6 +1196,7 @@ def update_order_status():
 
 
 @app.route('/api/admin/inventory', methods=['GET'])
+@db_route('read_after_write')
 def get_inventory_status():
     """
     Fetches inventory status showing items that need reordering.
@@ -796,7 +1248,72 @@ def get_inventory_status():
         cursor.close()
         db.close()
 
+@app.route('/api/admin/low-stock-alerts', methods=['GET'])
+@db_route('read_after_write')
+def get_low_stock_alerts():
+    """
+    Lists open low-stock alerts (one per item, maintained by the CheckReorderLevel trigger).
+    Optional shop_id filter.
+    """
+    shop_id = request.args.get('shop_id')
+    
+    db = get_db_connection()
+    if not db:
+        return jsonify({'status': 'Failed', 'message': 'Database connection error'}), 500
+
+    cursor = db.cursor(dictionary=True)
+    
+    query = """
+        SELECT 
+            A.inventory_id,
+            A.item_name,
+            A.quantity,
+            A.reorder_level,
+            A.raised_at,
+            A.updated_at,
+            MI.item_ID,
+            S.shop_ID,
+            S.shop_name
+        FROM 
+            Low_Stock_Alert A
+        JOIN 
+            Inventory I ON A.inventory_id = I.inventory_id
+        LEFT JOIN 
+            Menu_Item MI ON I.item_ID = MI.item_ID
+        LEFT JOIN 
+            Shop S ON MI.shop_ID = S.shop_ID
+        WHERE 
+            A.is_open = TRUE
+    """
+    
+    if shop_id:
+        query += " AND S.shop_ID = %s"
+    
+    query += " ORDER BY A.raised_at DESC"
+    
+    try:
+        cursor.execute(query, (shop_id,) if shop_id else ())
+        alerts = cursor.fetchall()
+        
+        for alert in alerts:
+            alert['raised_at'] = alert['raised_at'].strftime('%Y-%m-%d %H:%M:%S')
+            alert['updated_at'] = alert['updated_at'].strftime('%Y-%m-%d %H:%M:%S')
+        
+        return jsonify({
+            'status': 'Success',
+            'alert_count': len(alerts),
+            'alerts': alerts
+        })
+
+    except mysql.connector.Error as err:
+        print(f"Low Stock Alerts Fetch Error: {err}")
+        return jsonify({'status': 'Failed', 'message': f'Server error fetching low stock alerts: {err.msg}'}), 500
+    finally:
+        cursor.close()
+        db.close()
+
 @app.route('/api/admin/update-inventory', methods=['POST'])
+@db_route('write')
 def update_inventory():
     """Updates inventory by reducing quantity when items are used."""
     data = request.json
@@ -848,6 +1365,7 @@ def update_inventory():
         
         cursor.execute(update_query, (new_quantity, new_quantity, item_id))
         db.commit()
+        cache.invalidate('menu:')
         
         # Get updated inventory info
         cursor.execute("""
@@ -884,6 +1402,7 @@ def update_inventory():
         db.close()
 
 @app.route('/api/admin/sales-report', methods=['GET'])
+@db_route('read_only')
 def get_sales_report():
     """
     Executes a complex query for sales analysis.
@@ -899,15 +1418,13 @@ def get_sales_report():
             S.shop_name, 
             COUNT(DISTINCT O.order_id) AS total_orders, 
             SUM(OMI.quantity) AS total_items_sold,
-            SUM(MI.price * OMI.quantity) AS gross_revenue
+            SUM(OMI.unit_price * OMI.quantity) AS gross_revenue
         FROM 
             Orders O
         JOIN 
             Shop S ON O.shop_id = S.shop_ID
         JOIN 
             Order_Menu_Item OMI ON O.order_id = OMI.order_id
-        JOIN 
-            Menu_Item MI ON OMI.item_id = MI.item_ID
         GROUP BY 
             S.shop_name
         ORDER BY 
@@ -932,15 +1449,624 @@ def get_sales_report():
 
 
 
+# EXPORT APIS
+
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_QUERIES = {
+    'orders': """
+        SELECT 
+            O.order_id,
+            O.order_time,
+            O.status,
+            O.quantity,
+            O.pickup_time,
+            O.total_amount,
+            O.customer_id,
+            O.shop_id
+        FROM 
+            Orders O
+        WHERE 1 = 1
+    """,
+    'order-items': """
+        SELECT 
+            OMI.order_id,
+            O.order_time,
+            O.shop_id,
+            OMI.item_id,
+            MI.item_name,
+            OMI.quantity,
+            OMI.unit_price
+        FROM 
+            Order_Menu_Item OMI
+        JOIN 
+            Orders O ON OMI.order_id = O.order_id
+        JOIN 
+            Menu_Item MI ON OMI.item_id = MI.item_ID
+        WHERE 1 = 1
+    """,
+    'payments': """
+        SELECT 
+            P.payment_id,
+            P.timestamp,
+            P.mode,
+            P.pstatus,
+            P.order_id,
+            O.shop_id
+        FROM 
+            Payment P
+        JOIN 
+            Orders O ON P.order_id = O.order_id
+        WHERE 1 = 1
+    """,
+}
+
+# from/to filter and sort on when the row happened: the order, or the payment itself
+EXPORT_DATE_COLUMNS = {
+    'orders': 'O.order_time',
+    'order-items': 'O.order_time',
+    'payments': 'P.timestamp',
+}
+
+# Characters allowed in the download filename, anything else becomes '-'
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9_-]')
+
+
+def _export_value(value):
+    """Converts a DB value to something csv/json can write."""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _stream_csv(cursor, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+        for row in rows:
+            writer.writerow([_export_value(row[col]) for col in columns])
+        yield buffer.getvalue()
+        if not rows:
+            return
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _stream_ndjson(cursor, columns):
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+        if not rows:
+            return
+        yield ''.join(
+            json.dumps({col: _export_value(row[col]) for col in columns}) + '\n'
+            for row in rows
+        )
+
+
+@app.route('/api/admin/export/<dataset>', methods=['GET'])
+@db_route('read_only')
+def export_data(dataset):
+    """
+    Streams orders, order-items or payments as CSV or NDJSON.
+    Optional filters: shop_id, from and to (YYYY-MM-DD, inclusive; the payment
+    timestamp for payments, the order time otherwise).
+    Rows are read through an unbuffered server-side cursor and sent in chunks,
+    so memory use does not grow with the size of the export.
+    """
+    if dataset not in EXPORT_QUERIES:
+        return jsonify({'status': 'Failed', 'message': f'Unknown dataset. Must be one of: {list(EXPORT_QUERIES)}'}), 400
+
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'status': 'Failed', 'message': 'format must be csv or ndjson'}), 400
+
+    query = EXPORT_QUERIES[dataset]
+    date_column = EXPORT_DATE_COLUMNS[dataset]
+    params = []
+
+    shop_id = request.args.get('shop_id')
+    if shop_id:
+        query += " AND O.shop_id = %s"
+        params.append(shop_id)
+
+    try:
+        date_from = request.args.get('from')
+        if date_from:
+            query += f" AND {date_column} >= %s"
+            params.append(datetime.strptime(date_from, '%Y-%m-%d'))
+        date_to = request.args.get('to')
+        if date_to:
+            query += f" AND {date_column} < %s"
+            params.append(datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1))
+    except ValueError:
+        return jsonify({'status': 'Failed', 'message': 'from/to must be dates in YYYY-MM-DD format'}), 400
+
+    query += f" ORDER BY {date_column}"
+
+    connection = get_db_connection_pymysql(cursorclass=pymysql.cursors.SSDictCursor)
+    if not connection:
+        return jsonify({'status': 'Failed', 'message': 'Database connection error'}), 500
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        columns = [col[0] for col in cursor.description]
+    except Exception as err:
+        connection.close()
+        print(f"Export Query Error: {err}")
+        return jsonify({'status': 'Failed', 'message': f'Server error exporting {dataset}: {err}'}), 500
+
+    def generate():
+        try:
+            if export_format == 'csv':
+                yield from _stream_csv(cursor, columns)
+            else:
+                yield from _stream_ndjson(cursor, columns)
+        except Exception as err:
+            # Re-raise so the server aborts the chunked response; a clean end
+            # would hand the client a truncated file that looks complete.
+            print(f"Export Stream Error: {err}")
+            raise
+        finally:
+            # Closing the connection (not the cursor) avoids draining unread rows
+            # when the client disconnects halfway through.
+            connection.close()
+
+    filename = '_'.join(_UNSAFE_FILENAME_CHARS.sub('-', part) for part in (dataset, shop_id, date_from, date_to) if part)
+    if export_format == 'csv':
+        mimetype, extension = 'text/csv', 'csv'
+    else:
+        mimetype, extension = 'application/x-ndjson', 'ndjson'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}.{extension}"',
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Simple health check endpoint"""
+    """
+    Health check that actually reaches the primary database.
+    Returns 503 while it is unreachable; an open circuit breaker answers without waiting on a connect.
+    """
+    started = time.perf_counter()
+    database = 'reachable'
+    db = get_db_connection(route='write')
+    if db:
+        try:
+            cursor = db.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+        except mysql.connector.Error as err:
+            print(f"Health Check Query Error: {err}")
+            database = 'unreachable'
+        finally:
+            db.close()
+    else:
+        database = 'unreachable'
+
+    healthy = database == 'reachable'
     return jsonify({
-        'status': 'healthy',
-        'message': 'PESU Food Systems API is running',
+        'status': 'healthy' if healthy else 'unhealthy',
+        'message': 'PESU Food Systems API is running' if healthy else 'Database is unreachable',
+        'database': database,
+        'database_latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        'storage_backend': storage.name,
+        'circuit_breakers': storage.breaker_states(),
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    })
+    }), 200 if healthy else 503
+
+
+# BACKGROUND TASKS
+#
+# Work that follows an order write but need not hold up the response is registered
+# here with @task_queue.register(event). place_order, update_order_status and
+# complete_order write the event to Task_Outbox in their own transaction and hand it
+# to the worker pool after commit; failed hooks are retried with backoff (see tasks.py).
+#   order_placed          {customer_id, payment_mode, order_time, orders: [{order_id, shop_id, ...}]}
+#   order_status_changed  {order_id or prep_id, status, changed_at}
+
+
+@app.before_request
+def start_task_workers():
+    """Starts the workers in the serving process (not at import, so forking servers work)."""
+    task_queue.start()
+
+
+@task_queue.register('order_placed')
+def log_order_placed(payload):
+    for order in payload['orders']:
+        items = ', '.join(f"{item['item_name']} x {item['quantity']}" for item in order['items'])
+        app.logger.info("Order %s placed by %s at %s: %s = ₹%.2f (%s)", order['order_id'], payload['customer_id'],
+                        order['shop_id'], items, order['total_amount'], payload['payment_mode'])
+
+
+@task_queue.register('order_status_changed')
+def log_order_status_changed(payload):
+    app.logger.info("Order %s is now %s", payload['order_id'] or payload['prep_id'], payload['status'])
+
+
+@app.route('/api/admin/task-metrics', methods=['GET'])
+def get_task_metrics():
+    """Queue depth, in-flight and retry counters for this worker, plus outbox totals by status."""
+    return jsonify(task_queue.metrics())
+
+
+
+# CLI: BULK CATALOGUE IMPORT
+
+IMPORT_BATCH_SIZE = 1000
+INVENTORY_UNITS = ('kg', 'packets', 'l/ml')
+
+
+def _read_catalogue(path, file_format):
+    """Reads catalogue rows from a CSV file or a JSON list of objects."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'json':
+            rows = json.load(f)
+            if not isinstance(rows, list):
+                raise click.ClickException('JSON catalogue must be a list of objects')
+            return rows
+        return list(csv.DictReader(f))
+
+
+def _whole_number(value):
+    """int() that rejects a JSON 3.7 the way it already rejects a CSV "3.7", instead of truncating it."""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+
+def _validate_catalogue(rows, existing_shops=None, existing_inventory=()):
+    """
+    Checks every row against the schema constraints in one pass.
+    existing_shops maps the shop_IDs already in the database to their shop_name, so the
+    Menu_Item foreign key and the unique Shop.shop_name can be checked before any write.
+    existing_inventory lists the (inventory_id, item_name, item_ID) rows already in the
+    database: a stock row may only update the Inventory row that is already its own.
+    IDs and names are compared case-insensitively, like MySQL does.
+    Returns (shops, menu_items, inventory, errors) ready for executemany.
+    """
+    existing_shops = {shop_id.upper(): name for shop_id, name in (existing_shops or {}).items()}
+    # Inventory has three unique keys; the upsert would match an existing row on any of them
+    stock_owners = {}
+    for inventory_id, item_name, stock_item_id in existing_inventory:
+        owner = (inventory_id.upper(), (stock_item_id or '').upper())
+        stock_owners[('inventory_id', inventory_id.upper())] = owner
+        stock_owners[('inventory_name', item_name.casefold())] = owner
+        if stock_item_id:
+            stock_owners[('item_ID', stock_item_id.upper())] = owner
+    shops, menu_items, inventory, errors = {}, [], [], []
+    seen_items, seen_inventory_ids, seen_inventory_names = set(), set(), set()
+
+    def field(row, name, default=None):
+        value = row.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return default
+        return value.strip() if isinstance(value, str) else value
+
+    def number(row, name, line, cast, default=None, minimum=None, strict=False, maximum=None, places=None):
+        raw = field(row, name, default)
+        if raw is None:
+            return None
+        try:
+            value = cast(raw)
+            if isinstance(value, Decimal) and not value.is_finite():
+                raise ValueError(value)
+            if minimum is not None and (value <= minimum if strict else value < minimum):
+                errors.append(f"row {line}: {name} must be {'>' if strict else '>='} {minimum}, got {value}")
+                return None
+            if maximum is not None and value > maximum:
+                errors.append(f'row {line}: {name} must be at most {maximum}, got {value}')
+                return None
+            if places is not None and value.as_tuple().exponent < -places:
+                errors.append(f'row {line}: {name} must have at most {places} decimal places, got {value}')
+                return None
+        except (ValueError, ArithmeticError, TypeError):
+            errors.append(f'row {line}: {name} must be a number, got {raw!r}')
+            return None
+        return value
+
+    for line, row in enumerate(rows, start=2):
+        item_id = field(row, 'item_ID')
+        item_name = field(row, 'item_name')
+        shop_id = field(row, 'shop_ID')
+        if not item_id or not item_name or not shop_id:
+            errors.append(f'row {line}: item_ID, item_name and shop_ID are required')
+            continue
+        if len(item_id) > 10 or len(shop_id) > 10 or len(item_name) > 100:
+            errors.append(f'row {line}: item_ID/shop_ID must be at most 10 characters and item_name at most 100')
+            continue
+        if item_id.upper() in seen_items:
+            errors.append(f'row {line}: duplicate item_ID {item_id}')
+            continue
+        seen_items.add(item_id.upper())
+
+        shop_name = field(row, 'shop_name')
+        location = field(row, 'location')
+        if len(shop_name or '') > 100 or len(location or '') > 100:
+            errors.append(f'row {line}: shop_name and location must be at most 100 characters')
+            continue
+        if shop_name:
+            known = shops.get(shop_id.upper())
+            if known and known[1] != shop_name:
+                errors.append(f'row {line}: shop {shop_id} already has shop_name {known[1]!r}, got {shop_name!r}')
+                continue
+            shops[shop_id.upper()] = (shop_id, shop_name, location)
+
+        # Menu_Item.price is DECIMAL(6,2)
+        price = number(row, 'price', line, lambda value: Decimal(str(value)), minimum=0, strict=True,
+                       maximum=Decimal('9999.99'), places=2)
+        countdown = number(row, 'countdown', line, _whole_number, default=0, minimum=0)
+        delay = number(row, 'delay', line, _whole_number, default=0, minimum=0)
+        if price is None:
+            if field(row, 'price') is None:
+                errors.append(f'row {line}: price is required')
+            continue
+        if countdown is None or delay is None:
+            continue
+
+        menu_items.append((item_id, item_name, countdown, delay, price, shop_id))
+
+        # Inventory columns are optional; a row without quantity only touches the menu
+        if field(row, 'quantity') is None:
+            continue
+        quantity = number(row, 'quantity', line, _whole_number, minimum=0)
+        reorder_level = number(row, 'reorder_level', line, _whole_number, default=10, minimum=0)
+        unit = field(row, 'unit')
+        if unit is not None and unit not in INVENTORY_UNITS:
+            errors.append(f'row {line}: unit must be one of {INVENTORY_UNITS}, got {unit!r}')
+            continue
+        if quantity is None or reorder_level is None:
+            continue
+        inventory_id = field(row, 'inventory_id', item_id)
+        inventory_name = field(row, 'inventory_name', item_name)
+        if len(inventory_id) > 10 or len(inventory_name) > 100:
+            errors.append(f'row {line}: inventory_id must be at most 10 characters and inventory_name at most 100')
+            continue
+        if inventory_id.upper() in seen_inventory_ids:
+            errors.append(f'row {line}: duplicate inventory_id {inventory_id}')
+            continue
+        if inventory_name.casefold() in seen_inventory_names:
+            errors.append(f'row {line}: duplicate inventory item_name {inventory_name}')
+            continue
+        owner = (inventory_id.upper(), item_id.upper())
+        clashes = [
+            (column, value, stock_owners[(column, key)])
+            for column, value, key in (
+                ('inventory_id', inventory_id, inventory_id.upper()),
+                ('inventory_name', inventory_name, inventory_name.casefold()),
+                ('item_ID', item_id, item_id.upper()),
+            )
+            if stock_owners.get((column, key), owner) != owner
+        ]
+        if clashes:
+            column, value, (other_inventory_id, other_item_id) = clashes[0]
+            errors.append(f"row {line}: {column} {value!r} already belongs to inventory {other_inventory_id} "
+                          f"of item {other_item_id or 'none'}")
+            continue
+        seen_inventory_ids.add(inventory_id.upper())
+        seen_inventory_names.add(inventory_name.casefold())
+        inventory.append((
+            inventory_id, inventory_name, quantity,
+            quantity > 0, reorder_level, unit, item_id
+        ))
+
+    # Menu_Item.shop_ID references Shop, which needs a shop_name to be created
+    missing = sorted({item[5] for item in menu_items
+                      if item[5].upper() not in shops and item[5].upper() not in existing_shops})
+    for shop_id in missing:
+        errors.append(f'shop {shop_id} is not in the database, add a shop_name to one of its rows')
+
+    # Shop.shop_name is UNIQUE (and compared case-insensitively by MySQL)
+    names = {name.casefold(): shop_id for shop_id, name in existing_shops.items() if shop_id not in shops}
+    for key, (shop_id, shop_name, _) in shops.items():
+        owner = names.setdefault(shop_name.casefold(), key)
+        if owner != key:
+            errors.append(f'shop {shop_id}: shop_name {shop_name!r} is already used by shop {owner}')
+
+    return list(shops.values()), menu_items, inventory, errors
+
+
+@app.cli.command('import-catalogue')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'json']),
+              help='File format (defaults to the file extension).')
+@click.option('--dry-run', is_flag=True, help='Validate only, do not write anything.')
+def import_catalogue(path, file_format, dry_run):
+    """
+    Imports shops, menu items and stock from a CSV or JSON file.
+
+    Each row has item_ID, item_name, price, shop_ID and optionally countdown,
+    delay, shop_name, location, quantity, reorder_level, unit, inventory_id
+    and inventory_name. Existing shops, items and stock are updated in place.
+    """
+    started = time.perf_counter()
+    file_format = file_format or ('json' if path.lower().endswith('.json') else 'csv')
+    rows = _read_catalogue(path, file_format)
 
+    connection = get_db_connection_pymysql(route='write')
+    if not connection:
+        raise click.ClickException('Database connection failed')
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT shop_ID, shop_name FROM Shop")
+        existing_shops = {row['shop_ID']: row['shop_name'] for row in cursor.fetchall()}
+        cursor.execute("SELECT inventory_id, item_name, item_ID FROM Inventory")
+        existing_inventory = [(row['inventory_id'], row['item_name'], row['item_ID']) for row in cursor.fetchall()]
+    except Exception as err:
+        connection.close()
+        raise click.ClickException(f'Could not read existing shops and stock: {err}')
+
+    shops, menu_items, inventory, errors = _validate_catalogue(rows, existing_shops, existing_inventory)
+    if errors:
+        connection.close()
+        for error in errors[:50]:
+            click.echo(error, err=True)
+        if len(errors) > 50:
+            click.echo(f'... and {len(errors) - 50} more', err=True)
+        raise click.ClickException(f'{len(errors)} validation errors, nothing was imported')
+
+    click.echo(f'Validated {len(rows)} rows: {len(shops)} shops, {len(menu_items)} menu items, {len(inventory)} stock entries')
+    if dry_run:
+        connection.close()
+        return
+
+    statements = [
+        ("""
+            INSERT INTO Shop (shop_ID, shop_name, location) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE shop_name = VALUES(shop_name), location = VALUES(location)
+        """, shops),
+        ("""
+            INSERT INTO Menu_Item (item_ID, item_name, countdown, delay, price, shop_ID) VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE item_name = VALUES(item_name), countdown = VALUES(countdown),
+                delay = VALUES(delay), price = VALUES(price), shop_ID = VALUES(shop_ID)
+        """, menu_items),
+        ("""
+            INSERT INTO Inventory (inventory_id, item_name, quantity, available, reorder_level, unit, item_ID) VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE item_name = VALUES(item_name), quantity = VALUES(quantity),
+                available = VALUES(available), reorder_level = VALUES(reorder_level), unit = VALUES(unit)
+        """, inventory),
+    ]
+
+    try:
+        cursor = connection.cursor()
+        connection.begin()
+        for statement, values in statements:
+            # PyMySQL turns executemany on an INSERT ... VALUES into multi-row INSERTs
+            for start in range(0, len(values), IMPORT_BATCH_SIZE):
+                cursor.executemany(statement, values[start:start + IMPORT_BATCH_SIZE])
+        connection.commit()
+    except Exception as err:
+        connection.rollback()
+        raise click.ClickException(f'Import failed, rolled back: {err}')
+    finally:
+        connection.close()
+
+    cache.invalidate('menu:')
+    click.echo(f'Imported in {time.perf_counter() - started:.2f}s')
+
+
+# CLI: IN-PROCESS BENCHMARK
+
+def _seed_benchmark_data(shops, items_per_shop, customers):
+    """Loads a synthetic catalogue into the embedded database (once)."""
+    db = get_db_connection(route='write')
+    cursor = db.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM Shop WHERE shop_ID LIKE 'BS%'")
+        if cursor.fetchone()[0]:
+            return
+        shop_ids = [f'BS{s:03d}' for s in range(shops)]
+        cursor.executemany("INSERT INTO Shop (shop_ID, shop_name, location) VALUES (%s, %s, %s)",
+                           [(shop_id, f'Bench Shop {shop_id}', 'Bench Block') for shop_id in shop_ids])
+        cursor.executemany("INSERT INTO Kitchen_Staff (staff_id, staff_name, shop_id, role, shift_timing) VALUES (%s, %s, %s, %s, %s)",
+                           [(f'BK{shop_id}', f'Cook {shop_id}', shop_id, 'Cook', 'Day') for shop_id in shop_ids])
+        cursor.executemany("INSERT INTO Customer (customer_id, name) VALUES (%s, %s)",
+                           [(f'BC{c:05d}', f'Student {c}') for c in range(customers)])
+        menu_items, inventory = [], []
+        for s, shop_id in enumerate(shop_ids):
+            for i in range(items_per_shop):
+                item_id = f'BI{s:03d}{i:03d}'
+                menu_items.append((item_id, f'Item {item_id}', random.randint(1, 10), random.randint(0, 3),
+                                   random.randint(10, 200), shop_id))
+                inventory.append((f'BV{s:03d}{i:03d}', f'Stock {item_id}', 100000, True, 10, 'packets', item_id))
+        cursor.executemany("INSERT INTO Menu_Item (item_ID, item_name, countdown, delay, price, shop_ID) VALUES (%s, %s, %s, %s, %s, %s)",
+                           menu_items)
+        cursor.executemany("INSERT INTO Inventory (inventory_id, item_name, quantity, available, reorder_level, unit, item_ID) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                           inventory)
+        db.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+
+@app.cli.command('benchmark')
+@click.option('--rounds', default=200, show_default=True, help='Customer sessions to simulate.')
+@click.option('--shops', default=5, show_default=True)
+@click.option('--items-per-shop', default=40, show_default=True)
+@click.option('--customers', default=500, show_default=True)
+@click.option('--profile', is_flag=True, help='Profile every request and report queries per call.')
+def benchmark(rounds, shops, items_per_shop, customers, profile):
+    """
+    Drives the whole API in-process against the embedded SQLite backend
+    (STORAGE_BACKEND=sqlite) and prints per-endpoint latency.
+    """
+    if storage.name != 'sqlite':
+        raise click.ClickException('benchmark writes synthetic data, run it with STORAGE_BACKEND=sqlite')
+
+    _seed_benchmark_data(shops, items_per_shop, customers)
+    client = app.test_client()
+    timings, query_counts = {}, {}
+
+    def call(name, method, url, **kwargs):
+        started = time.perf_counter()
+        # Handlers print their errors, keep them out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = client.open(url, method=method, **kwargs)
+        timings.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+        if 'X-DB-Query-Count' in response.headers:
+            query_counts.setdefault(name, []).append(int(response.headers['X-DB-Query-Count']))
+        if response.status_code >= 400:
+            click.echo(f'{name}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}', err=True)
+        return response
+
+    if profile:
+        # Profiling by header needs DB_PROFILE_TOKEN; the benchmark switches it on for every request instead
+        global DB_PROFILE
+        DB_PROFILE = True
+        # One line per request is enough; the per-statement logging would drown the report
+        app.logger.setLevel(logging.WARNING)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        shop = random.randrange(shops)
+        customer_id = f'BC{random.randrange(customers):05d}'
+        cart = random.sample(range(items_per_shop), k=random.randint(1, 4))
+
+        call('GET /api/menu', 'GET', '/api/menu')
+        order = call('POST /place_order', 'POST', '/place_order', json={
+            'customer_id': customer_id,
+            'shop_id': f'BS{shop:03d}',
+            'items': [{'item_ID': f'BI{shop:03d}{i:03d}', 'quantity': random.randint(1, 3)} for i in cart],
+            'payment_mode': 'UPI',
+        }).get_json()
+        call('GET my-orders', 'GET', f'/api/customer/my-orders/{customer_id}')
+        call('GET notifications', 'GET', f'/api/customer/notifications/{customer_id}')
+        active = call('GET active-orders', 'GET', f'/api/admin/active-orders?shop_id=BS{shop:03d}').get_json()
+        if active:
+            call('POST update-status', 'POST', '/api/admin/update-status', json={'prep_id': active[0]['prep_id']})
+        call('POST update-inventory', 'POST', '/api/admin/update-inventory',
+             json={'item_id': f'BI{shop:03d}{cart[0]:03d}', 'quantity_used': 1})
+        if order and order.get('order_id'):
+            call('POST complete-order', 'POST', f"/api/customer/complete-order/{order['order_id']}")
+        call('GET staff-info', 'GET', f'/api/kitchen/staff-info?staff_id=BKBS{shop:03d}')
+
+    for _ in range(max(rounds // 20, 1)):
+        call('GET inventory', 'GET', '/api/admin/inventory')
+        call('GET low-stock-alerts', 'GET', '/api/admin/low-stock-alerts')
+        call('GET sales-report', 'GET', '/api/admin/sales-report')
+        call('GET export orders', 'GET', '/api/admin/export/orders')
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"{'endpoint':<28}{'calls':>7}{'mean ms':>10}{'p95 ms':>10}{'queries':>9}")
+    for name, samples in timings.items():
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        queries = f'{statistics.mean(query_counts[name]):.1f}' if name in query_counts else '-'
+        click.echo(f'{name:<28}{len(samples):>7}{statistics.mean(samples):>10.2f}{p95:>10.2f}{queries:>9}')
+    total_calls = sum(len(samples) for samples in timings.values())
+    click.echo(f'{total_calls} requests in {elapsed:.2f}s ({total_calls / elapsed:.0f} req/s)')
 
 
 if __name__ == '__main__':
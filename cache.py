@@ -0,0 +1,291 @@
+"""
+Small cache layer shared by every worker process.
+
+Each worker keeps an in-process LRU (the "local" cache) in front of an optional
+shared backend:
+    memory://                      in-process only (default)
+    sqlite:///path/to/cache.db     a SQLite file shared by all workers on the host
+    redis://localhost:6379/0       a Redis-compatible server (needs the redis package)
+
+Writes call cache.invalidate(prefix). That removes the keys from the shared backend
+and broadcasts an invalidation message, so every worker drops its local copy too.
+Each worker must call cache.start() to listen for those messages. It is done on the
+first request rather than at import, so servers that fork after loading the app
+(gunicorn --preload) get a listener in every worker.
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class MemoryBackend:
+    """Thread-safe in-process cache with per-key TTL and LRU eviction."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def publish(self, prefix):
+        pass
+
+    def subscribe(self, callback):
+        pass
+
+
+class SQLiteBackend:
+    """
+    Cache stored in a SQLite file, shared by every process that opens the same path.
+    Invalidations are appended to a log table that each process polls.
+    """
+
+    POLL_INTERVAL = 0.5
+    INVALIDATION_RETENTION = 60
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS cache_invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                prefix TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        db.commit()
+
+    def _db(self):
+        # Connections are per thread and per process, a forked worker opens its own
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.db = sqlite3.connect(self.path, timeout=5)
+            self._local.pid = os.getpid()
+        return self._local.db
+
+    def get(self, key):
+        db = self._db()
+        row = db.execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return MISSING
+        now = time.time()
+        if row[1] < now:
+            db.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            db.commit()
+            return MISSING
+        db.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+        db.commit()
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl):
+        db = self._db()
+        now = time.time()
+        db.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value), now + ttl, now)
+        )
+        # LRU: drop the least recently read entries once over the limit
+        db.execute("""
+            DELETE FROM cache_entries WHERE key IN (
+                SELECT key FROM cache_entries ORDER BY last_access
+                LIMIT MAX((SELECT COUNT(*) FROM cache_entries) - ?, 0)
+            )
+        """, (self.max_entries,))
+        db.commit()
+
+    def delete_prefix(self, prefix):
+        db = self._db()
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        db.execute("DELETE FROM cache_entries WHERE key LIKE ? ESCAPE '\\'", (escaped + '%',))
+        db.commit()
+
+    def publish(self, prefix):
+        db = self._db()
+        now = time.time()
+        db.execute("INSERT INTO cache_invalidations (prefix, created_at) VALUES (?, ?)", (prefix, now))
+        db.execute("DELETE FROM cache_invalidations WHERE created_at < ?", (now - self.INVALIDATION_RETENTION,))
+        db.commit()
+
+    def subscribe(self, callback):
+        last_id = self._db().execute("SELECT IFNULL(MAX(id), 0) FROM cache_invalidations").fetchone()[0]
+
+        def poll():
+            nonlocal last_id
+            while True:
+                time.sleep(self.POLL_INTERVAL)
+                try:
+                    rows = self._db().execute(
+                        "SELECT id, prefix FROM cache_invalidations WHERE id > ? ORDER BY id", (last_id,)
+                    ).fetchall()
+                except sqlite3.Error as err:
+                    logger.warning("Cache invalidation poll failed: %s", err)
+                    continue
+                for row_id, prefix in rows:
+                    callback(prefix)
+                    last_id = row_id
+
+        threading.Thread(target=poll, name='cache-invalidations', daemon=True).start()
+
+
+class RedisBackend:
+    """
+    Cache stored in a Redis-compatible server. Eviction is left to the server;
+    run it with maxmemory-policy allkeys-lru. Invalidations go over pub/sub.
+    """
+
+    CHANNEL = 'pesu-cache-invalidate'
+
+    def __init__(self, url, namespace='pesu:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL points at Redis but the redis package is not installed (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.namespace = namespace
+
+    def get(self, key):
+        value = self.client.get(self.namespace + key)
+        return MISSING if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.namespace + key, pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def delete_prefix(self, prefix):
+        pattern = self.namespace + prefix.replace('*', '\\*').replace('?', '\\?').replace('[', '\\[') + '*'
+        keys = list(self.client.scan_iter(match=pattern, count=500))
+        if keys:
+            self.client.delete(*keys)
+
+    def publish(self, prefix):
+        self.client.publish(self.CHANNEL, prefix)
+
+    def subscribe(self, callback):
+        def listen():
+            while True:
+                try:
+                    pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.CHANNEL)
+                    for message in pubsub.listen():
+                        callback(message['data'].decode())
+                except Exception as err:
+                    logger.warning("Cache invalidation subscriber lost connection: %s", err)
+                    time.sleep(1)
+
+        threading.Thread(target=listen, name='cache-invalidations', daemon=True).start()
+
+
+class Cache:
+    """
+    Local LRU in front of an optional shared backend.
+    Errors from the shared backend are logged and treated as cache misses,
+    so a cache outage never fails a request.
+    """
+
+    def __init__(self, backend=None, default_ttl=30, local_ttl=2, max_entries=1024):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        # With a shared backend the local copy is only a short-lived read-through
+        self.local_ttl = local_ttl if backend else None
+        self.local = MemoryBackend(max_entries)
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts this process's invalidation listener (once per process)."""
+        if not self.backend or self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+        self.backend.subscribe(self.local.delete_prefix)
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        if self.backend:
+            try:
+                value = self.backend.get(key)
+            except Exception as err:
+                logger.warning("Cache get failed for %s: %s", key, err)
+                return default
+            if value is not MISSING:
+                self.local.set(key, value, self.local_ttl)
+                return value
+        return default
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl or self.default_ttl
+        self.local.set(key, value, min(ttl, self.local_ttl) if self.local_ttl else ttl)
+        if self.backend:
+            try:
+                self.backend.set(key, value, ttl)
+            except Exception as err:
+                logger.warning("Cache set failed for %s: %s", key, err)
+
+    def invalidate(self, *prefixes):
+        """Drops every key starting with one of the prefixes, in all workers."""
+        for prefix in prefixes:
+            self.local.delete_prefix(prefix)
+            if self.backend:
+                try:
+                    self.backend.delete_prefix(prefix)
+                    self.backend.publish(prefix)
+                except Exception as err:
+                    logger.warning("Cache invalidate failed for %s: %s", prefix, err)
+
+
+def create_cache(url=None, **kwargs):
+    """Builds a Cache from a CACHE_URL style string."""
+    url = url or os.getenv('CACHE_URL', 'memory://')
+    if url.startswith('memory://'):
+        backend = None
+    elif url.startswith('sqlite:///'):
+        backend = SQLiteBackend(url[len('sqlite:///'):])
+    elif url.startswith(('redis://', 'rediss://', 'unix://')):
+        backend = RedisBackend(url)
+    else:
+        raise ValueError(f"Unsupported CACHE_URL: {url}")
+    return Cache(backend, **kwargs)
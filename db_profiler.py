@@ -0,0 +1,122 @@
+"""
+Per-request database profiling.
+
+When a request is profiled, its connections are wrapped so every execute() is timed
+and recorded under its normalized SQL. At the end of the request the profile reports
+the query count and total DB time, flags N+1 patterns (the same SELECT issued over and
+over, e.g. one lookup per cart item) and lists slow statements so they can be EXPLAINed.
+"""
+import re
+import time
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Reduces a statement to its shape: literals and placeholders become ?, whitespace collapses."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (?)', sql)
+    return _WHITESPACE.sub(' ', sql).strip().rstrip(';')
+
+
+class QueryProfile:
+    """Everything one request sent to the database."""
+
+    def __init__(self, slow_query_ms=200, n_plus_one_threshold=3):
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.statements = {}  # normalized sql -> {'count', 'total_ms'}
+        self.slow_queries = []  # (sql, params, ms)
+        self.query_count = 0
+        self.total_ms = 0.0
+
+    def record(self, sql, params, elapsed_ms):
+        self.query_count += 1
+        self.total_ms += elapsed_ms
+        stats = self.statements.setdefault(normalize_sql(sql), {'count': 0, 'total_ms': 0.0})
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        if elapsed_ms >= self.slow_query_ms:
+            self.slow_queries.append((sql, params, elapsed_ms))
+
+    def n_plus_one(self):
+        """SELECTs repeated often enough in one request to be a loop of lookups."""
+        return [
+            {'sql': sql, 'count': stats['count'], 'total_ms': round(stats['total_ms'], 2)}
+            for sql, stats in self.statements.items()
+            if stats['count'] >= self.n_plus_one_threshold and sql.upper().startswith('SELECT')
+        ]
+
+    def report(self):
+        return {
+            'query_count': self.query_count,
+            'total_db_ms': round(self.total_ms, 2),
+            'statements': [
+                {'sql': sql, 'count': stats['count'], 'total_ms': round(stats['total_ms'], 2)}
+                for sql, stats in sorted(self.statements.items(), key=lambda s: -s[1]['total_ms'])
+            ],
+            'n_plus_one': self.n_plus_one(),
+            'slow_queries': [
+                {'sql': normalize_sql(sql), 'ms': round(ms, 2)} for sql, _, ms in self.slow_queries
+            ],
+        }
+
+
+class ProfiledCursor:
+    """Cursor proxy that times execute() and executemany()."""
+
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._profile.record(sql, params, (time.perf_counter() - started) * 1000)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            self._profile.record(sql, None, (time.perf_counter() - started) * 1000)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+class ProfiledConnection:
+    """Connection proxy whose cursors report to a QueryProfile."""
+
+    def __init__(self, connection, profile):
+        self._connection = connection
+        self._profile = profile
+
+    def cursor(self, *args, **kwargs):
+        return ProfiledCursor(self._connection.cursor(*args, **kwargs), self._profile)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._connection.close()
@@ -5,11 +5,10 @@ RETURNS DECIMAL(10,2)
 DETERMINISTIC
 BEGIN
     DECLARE total DECIMAL(10,2);
-    SELECT SUM(m.price * o.quantity)
+    SELECT total_amount
     INTO total
-    FROM Order_Menu_Item o
-    JOIN Menu_Item m ON o.item_id = m.item_ID
-    WHERE o.order_id = p_order_id;
+    FROM Orders
+    WHERE order_id = p_order_id;
     RETURN IFNULL(total, 0);
 END //
 DELIMITER ;
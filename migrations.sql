@@ -0,0 +1,135 @@
+-- MIGRATIONS
+-- Run these in order against an existing pesu_food_systems database.
+-- Fresh installs from PESU_FOOD_SYSTEMS.sql already include every change below.
+
+
+-- 1. Persist order totals at placement
+-- Order_Menu_Item keeps the unit price paid and Orders keeps the bill total,
+-- so totals no longer change when a menu price does.
+ALTER TABLE Order_Menu_Item ADD COLUMN unit_price DECIMAL(6,2);
+ALTER TABLE Orders ADD COLUMN total_amount DECIMAL(10,2);
+
+-- Backfill: older lines only know today's menu price
+UPDATE Order_Menu_Item OMI
+JOIN Menu_Item MI ON OMI.item_id = MI.item_ID
+SET OMI.unit_price = MI.price
+WHERE OMI.unit_price IS NULL;
+
+UPDATE Orders O
+LEFT JOIN (
+    SELECT order_id, SUM(unit_price * quantity) AS total
+    FROM Order_Menu_Item
+    GROUP BY order_id
+) T ON O.order_id = T.order_id
+SET O.total_amount = IFNULL(T.total, 0)
+WHERE O.total_amount IS NULL;
+
+ALTER TABLE Order_Menu_Item MODIFY unit_price DECIMAL(6,2) NOT NULL CHECK (unit_price > 0);
+ALTER TABLE Orders MODIFY total_amount DECIMAL(10,2) NOT NULL DEFAULT 0 CHECK (total_amount >= 0);
+
+-- GetOrderTotal now reads the stored total
+DROP FUNCTION IF EXISTS GetOrderTotal;
+DELIMITER //
+CREATE FUNCTION GetOrderTotal(p_order_id VARCHAR(20))
+RETURNS DECIMAL(10,2)
+DETERMINISTIC
+BEGIN
+    DECLARE total DECIMAL(10,2);
+    SELECT total_amount
+    INTO total
+    FROM Orders
+    WHERE order_id = p_order_id;
+    RETURN IFNULL(total, 0);
+END //
+DELIMITER ;
+
+
+-- 2. Coalesce low-stock alerts
+-- CheckReorderLevel used to add a Notification on every update of an already low item.
+-- It now keeps one Low_Stock_Alert row per item and notifies once per drop below the reorder level.
+CREATE TABLE Low_Stock_Alert (
+    inventory_id VARCHAR(10) PRIMARY KEY,
+    item_name VARCHAR(100) NOT NULL,
+    quantity INT NOT NULL,
+    reorder_level INT NOT NULL,
+    is_open BOOLEAN NOT NULL DEFAULT TRUE,
+    raised_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    resolved_at DATETIME,
+    INDEX idx_open_alerts (is_open, raised_at),
+    FOREIGN KEY (inventory_id) REFERENCES Inventory(inventory_id)
+        ON DELETE CASCADE
+);
+
+-- Open alerts for items that are already low, so they are not re-notified
+INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at)
+SELECT inventory_id, item_name, quantity, reorder_level, TRUE, NOW(), NOW()
+FROM Inventory
+WHERE quantity <= reorder_level;
+
+DROP TRIGGER IF EXISTS CheckReorderLevel;
+DELIMITER //
+CREATE TRIGGER CheckReorderLevel
+AFTER UPDATE ON Inventory
+FOR EACH ROW
+BEGIN
+    IF NEW.quantity <= NEW.reorder_level AND OLD.quantity > OLD.reorder_level THEN
+        INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+        VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+        ON DUPLICATE KEY UPDATE
+            item_name = NEW.item_name,
+            quantity = NEW.quantity,
+            reorder_level = NEW.reorder_level,
+            is_open = TRUE,
+            raised_at = NOW(),
+            updated_at = NOW(),
+            resolved_at = NULL;
+        INSERT INTO Notification (notification_id, message, generated_at, is_read)
+        VALUES (CONCAT('N', LEFT(REPLACE(UUID(), '-', ''), 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+    ELSEIF NEW.quantity <= NEW.reorder_level THEN
+        IF NEW.quantity <> OLD.quantity OR NEW.reorder_level <> OLD.reorder_level THEN
+            INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+            VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+            ON DUPLICATE KEY UPDATE
+                quantity = NEW.quantity,
+                reorder_level = NEW.reorder_level,
+                updated_at = NOW();
+            -- ROW_COUNT() is 1 only when the item had no alert yet (stock was loaded already low)
+            IF ROW_COUNT() = 1 THEN
+                INSERT INTO Notification (notification_id, message, generated_at, is_read)
+                VALUES (CONCAT('N', LEFT(REPLACE(UUID(), '-', ''), 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+            END IF;
+        END IF;
+    ELSEIF OLD.quantity <= OLD.reorder_level THEN
+        UPDATE Low_Stock_Alert
+        SET quantity = NEW.quantity, is_open = FALSE, updated_at = NOW(), resolved_at = NOW()
+        WHERE inventory_id = NEW.inventory_id AND is_open = TRUE;
+    END IF;
+END //
+DELIMITER ;
+
+
+-- 3. Background task outbox
+-- After-commit work (order placed, status changed) is recorded here in the same
+-- transaction as the order, and deleted once a background worker has run it.
+CREATE TABLE Task_Outbox (
+    task_id VARCHAR(40) PRIMARY KEY,
+    event VARCHAR(50) NOT NULL,
+    hook VARCHAR(150) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'Pending' CHECK (status IN ('Pending', 'Failed')),
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL,
+    lease_id VARCHAR(32),
+    claimed_until DATETIME,
+    last_error VARCHAR(255),
+    created_at DATETIME NOT NULL,
+    INDEX idx_outbox_due (status, next_attempt_at)
+);
+
+
+-- 4. Index the export date filters
+-- /export/<dataset> filters Orders by order_time and Payment by timestamp;
+-- without these indexes every export with a date range scans the whole table.
+CREATE INDEX idx_orders_time ON Orders (order_time);
+CREATE INDEX idx_payment_time ON Payment (timestamp);
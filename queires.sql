@@ -50,6 +50,7 @@ CREATE TABLE Orders (
     status VARCHAR(50),
     quantity INT,
     pickup_time DATETIME,
+    total_amount DECIMAL(10,2),
     customer_id VARCHAR(20),
     shop_id VARCHAR(10),
     FOREIGN KEY (customer_id) REFERENCES Customer(customer_id),
@@ -60,6 +61,7 @@ CREATE TABLE Order_Menu_Item (
     order_id VARCHAR(20),
     item_id VARCHAR(10),
     quantity INT NOT NULL,
+    unit_price DECIMAL(6,2) NOT NULL,
     PRIMARY KEY (order_id, item_id),
     FOREIGN KEY (order_id) REFERENCES Orders(order_id),
     FOREIGN KEY (item_id) REFERENCES Menu_Item(item_ID)
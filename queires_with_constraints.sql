@@ -54,8 +54,10 @@ CREATE TABLE Orders (
     status VARCHAR(50) DEFAULT 'Pending',
     quantity INT CHECK (quantity > 0),
     pickup_time DATETIME,
+    total_amount DECIMAL(10,2) NOT NULL DEFAULT 0 CHECK (total_amount >= 0),
     customer_id VARCHAR(20),
     shop_id VARCHAR(10),
+    INDEX idx_orders_time (order_time),
     FOREIGN KEY (customer_id) REFERENCES Customer(customer_id)
         ON DELETE CASCADE,
     FOREIGN KEY (shop_id) REFERENCES Shop(shop_ID)
@@ -66,6 +68,7 @@ CREATE TABLE Order_Menu_Item (
     order_id VARCHAR(20),
     item_id VARCHAR(10),
     quantity INT NOT NULL CHECK (quantity > 0),
+    unit_price DECIMAL(6,2) NOT NULL CHECK (unit_price > 0),
     PRIMARY KEY (order_id, item_id),
     FOREIGN KEY (order_id) REFERENCES Orders(order_id)
         ON DELETE CASCADE,
@@ -78,6 +81,7 @@ CREATE TABLE Payment (
     mode VARCHAR(50) CHECK (mode IN ('Cash', 'UPI', 'Card', 'Online')),
     pstatus VARCHAR(50) CHECK (pstatus IN ('Success', 'Pending', 'Failed')),
     order_id VARCHAR(20) UNIQUE,
+    INDEX idx_payment_time (timestamp),
     FOREIGN KEY (order_id) REFERENCES Orders(order_id)
         ON DELETE CASCADE
 );
@@ -103,4 +107,33 @@ CREATE TABLE Notification (
         ON DELETE CASCADE,
     FOREIGN KEY (prep_id) REFERENCES Kitchen_Status(prep_id)
         ON DELETE CASCADE
+);
+
+CREATE TABLE Low_Stock_Alert (
+    inventory_id VARCHAR(10) PRIMARY KEY,
+    item_name VARCHAR(100) NOT NULL,
+    quantity INT NOT NULL,
+    reorder_level INT NOT NULL,
+    is_open BOOLEAN NOT NULL DEFAULT TRUE,
+    raised_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    resolved_at DATETIME,
+    INDEX idx_open_alerts (is_open, raised_at),
+    FOREIGN KEY (inventory_id) REFERENCES Inventory(inventory_id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE Task_Outbox (
+    task_id VARCHAR(40) PRIMARY KEY,
+    event VARCHAR(50) NOT NULL,
+    hook VARCHAR(150) NOT NULL,
+    payload TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'Pending' CHECK (status IN ('Pending', 'Failed')),
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL,
+    lease_id VARCHAR(32),
+    claimed_until DATETIME,
+    last_error VARCHAR(255),
+    created_at DATETIME NOT NULL,
+    INDEX idx_outbox_due (status, next_attempt_at)
 );
\ No newline at end of file
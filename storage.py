@@ -0,0 +1,558 @@
+"""
+Storage backends behind get_db_connection() / get_db_connection_pymysql().
+
+The handlers are written against MySQL: %s placeholders, MySQL SQL, and the
+mysql.connector / PyMySQL cursor APIs. A backend hands out connections that
+speak exactly that, so the handlers do not change between backends.
+
+    STORAGE_BACKEND=mysql   (default) pooled MySQL connections per host, with connect/read
+                            timeouts and a circuit breaker per host
+    STORAGE_BACKEND=sqlite  embedded SQLite file in SQLITE_PATH, schema created from
+                            PESU_FOOD_SYSTEMS.sql, with the MySQL dialect translated
+                            and the two triggers emulated. No server needed, which is
+                            meant for local benchmarking and profiling.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import mysql.connector
+import mysql.connector.pooling
+import pymysql
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PESU_FOOD_SYSTEMS.sql')
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class StorageBackend:
+    """
+    connect(host, port)               -> connection with a mysql.connector style cursor(dictionary=...)
+    connect_dict(host, port, unbuffered) -> connection whose cursors return dicts (PyMySQL style)
+    Both return None-free connections or raise mysql.connector.Error.
+    """
+
+    name = None
+    supports_replicas = False
+
+    def connect(self, host, port):
+        raise NotImplementedError
+
+    def connect_dict(self, host, port, unbuffered=False):
+        raise NotImplementedError
+
+    def breaker_states(self):
+        """{'host:port': state} for every circuit breaker, empty when there are none."""
+        return {}
+
+
+class CircuitOpenError(mysql.connector.errors.InterfaceError):
+    """Raised instead of connecting while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    closed    - calls go through; failure_threshold failures in a row open the circuit
+    open      - calls fail immediately with CircuitOpenError for reset_timeout seconds
+    half_open - one probe call is let through; success closes the circuit, failure re-opens it.
+                A probe that reports neither within reset_timeout is replaced by a new one.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.probe_started_at = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_started_at = now
+                return
+            if self.state == self.HALF_OPEN and now - self.probe_started_at >= self.reset_timeout:
+                self.probe_started_at = now
+                return
+            raise CircuitOpenError(msg=f'Database {self.name} unavailable (circuit {self.state}), failing fast')
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+# Errors that say the server is down or too slow (read timeouts, lost connections),
+# as opposed to errors in the statement itself. The pure-Python mysql.connector raises
+# its *TimeoutError classes straight from errors.Error, outside OperationalError.
+SERVER_ERRORS = (
+    mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError,
+    mysql.connector.errors.ConnectionTimeoutError, mysql.connector.errors.ReadTimeoutError,
+    mysql.connector.errors.WriteTimeoutError,
+    pymysql.err.OperationalError, pymysql.err.InterfaceError, OSError,
+)
+
+# Deadlock (1213) and lock wait timeout (1205) come from a busy table, not a sick server.
+# PyMySQL raises both as OperationalError, so they are filtered out by number.
+LOCK_CONFLICT_ERRNOS = {1205, 1213}
+
+
+def is_server_error(err):
+    """True if err means the server is unreachable or unresponsive."""
+    if not isinstance(err, SERVER_ERRORS):
+        return False
+    errno = getattr(err, 'errno', None)  # mysql.connector and OSError
+    if errno is None and err.args:  # PyMySQL: (errno, message)
+        errno = err.args[0]
+    return errno not in LOCK_CONFLICT_ERRNOS
+
+
+class GuardedCursor:
+    """Cursor proxy that reports the outcome of execute() and executemany() to a circuit breaker."""
+
+    def __init__(self, cursor, breaker):
+        self._cursor = cursor
+        self._breaker = breaker
+
+    def _call(self, method, *args, **kwargs):
+        try:
+            result = method(*args, **kwargs)
+        except SERVER_ERRORS as err:
+            if is_server_error(err):
+                self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+        return result
+
+    def execute(self, *args, **kwargs):
+        return self._call(self._cursor.execute, *args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self._call(self._cursor.executemany, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+class GuardedConnection:
+    """Connection proxy whose cursors report to the host's circuit breaker."""
+
+    def __init__(self, connection, breaker):
+        self._connection = connection
+        self._breaker = breaker
+
+    def cursor(self, *args, **kwargs):
+        return GuardedCursor(self._connection.cursor(*args, **kwargs), self._breaker)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._connection.close()
+
+
+class MySQLBackend(StorageBackend):
+    """MySQL server(s): mysql.connector pools per host, plus plain PyMySQL connections."""
+
+    name = 'mysql'
+    supports_replicas = True
+
+    # How often a request waiting for a free pooled connection retries the checkout
+    POOL_RETRY_INTERVAL = 0.02
+
+    def __init__(self, user, password, database, pool_size=5, pool_timeout=5, connect_timeout=3, read_timeout=30,
+                 breaker_threshold=5, breaker_reset_timeout=30):
+        self.config = {'user': user, 'password': password, 'database': database}
+        self.pool_timeout = pool_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        self._breakers = {}
+
+    def _breaker(self, host, port):
+        key = f'{host}:{port}'
+        if key not in self._breakers:
+            with self._pools_lock:
+                self._breakers.setdefault(key, CircuitBreaker(key, self.breaker_threshold, self.breaker_reset_timeout))
+        return self._breakers[key]
+
+    def breaker_states(self):
+        return {name: breaker.state for name, breaker in self._breakers.items()}
+
+    def _guarded(self, host, port, connect):
+        """
+        Runs a connect attempt through the host's circuit breaker. The connection's
+        queries report to the same breaker, so a server that accepts connections but
+        times out on queries trips it too; only a completed query counts as a success.
+        """
+        breaker = self._breaker(host, port)
+        breaker.before_call()
+        try:
+            connection = connect()
+        except mysql.connector.errors.PoolError:
+            # Every pooled connection is busy, the server itself is fine
+            raise
+        except (mysql.connector.Error, pymysql.err.Error, OSError):
+            breaker.record_failure()
+            raise
+        return GuardedConnection(connection, breaker)
+
+    def _get_pool(self, host, port):
+        """Returns the connection pool for a host, creating it on first use."""
+        key = (host, port)
+        if key not in self._pools:
+            with self._pools_lock:
+                if key not in self._pools:
+                    self._pools[key] = mysql.connector.pooling.MySQLConnectionPool(
+                        pool_name=f'pesu_{len(self._pools)}',
+                        pool_size=self.pool_size,
+                        **self._connector_config(host, port)
+                    )
+        return self._pools[key]
+
+    def _connector_config(self, host, port):
+        return dict(
+            host=host,
+            port=port,
+            connection_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            write_timeout=self.read_timeout,
+            **self.config
+        )
+
+    def connect(self, host, port):
+        def connect():
+            # DB_POOL_SIZE is a hard limit: wait up to pool_timeout for a connection to be handed back
+            pool = self._get_pool(host, port)
+            deadline = time.monotonic() + self.pool_timeout
+            while True:
+                try:
+                    # Checking out a pooled connection pings it and reconnects if the server went away
+                    return pool.get_connection()
+                except mysql.connector.errors.PoolError:
+                    if time.monotonic() >= deadline:
+                        raise
+                    time.sleep(self.POOL_RETRY_INTERVAL)
+        return self._guarded(host, port, connect)
+
+    def connect_dict(self, host, port, unbuffered=False):
+        return self._guarded(host, port, lambda: pymysql.connect(
+            host=host,
+            port=port,
+            cursorclass=pymysql.cursors.SSDictCursor if unbuffered else pymysql.cursors.DictCursor,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            write_timeout=self.read_timeout,
+            **self.config
+        ))
+
+
+# SQLITE EMULATION
+
+# MySQL dialect -> SQLite, applied to every statement before it runs
+_SQL_REWRITES = [
+    (re.compile(r'DATE_SUB\(\s*(.+?)\s*,\s*INTERVAL\s+(\d+)\s+(\w+?)S?\s*\)', re.IGNORECASE),
+     lambda m: f"datetime({m.group(1)}, '-{m.group(2)} {m.group(3).lower()}s')"),
+    (re.compile(r"\s+SEPARATOR\s+('[^']*')", re.IGNORECASE), lambda m: f", {m.group(1)}"),
+    (re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', re.IGNORECASE), lambda m: 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'\bVALUES\((\w+)\)', re.IGNORECASE), lambda m: f'excluded.{m.group(1)}'),
+    (re.compile(r'%s'), lambda m: '?'),
+]
+
+# CREATE TABLE ... ( ..., INDEX name (cols) ) is MySQL-only
+_INLINE_INDEX = re.compile(r',\s*INDEX\s+(\w+)\s*\(([^)]*)\)', re.IGNORECASE)
+_TABLE_NAME = re.compile(r'CREATE\s+TABLE\s+(\w+)', re.IGNORECASE)
+
+# Kitchen_Staff is read by the login and staff-info handlers but is not part of
+# PESU_FOOD_SYSTEMS.sql, so the embedded database defines it itself.
+_EXTRA_TABLES = """
+CREATE TABLE IF NOT EXISTS Kitchen_Staff (
+    staff_id VARCHAR(20) PRIMARY KEY,
+    staff_name VARCHAR(100) NOT NULL,
+    shop_id VARCHAR(10),
+    role VARCHAR(50),
+    shift_timing VARCHAR(50),
+    FOREIGN KEY (shop_id) REFERENCES Shop(shop_ID)
+        ON DELETE CASCADE
+);
+"""
+
+# SQLite versions of the triggers in triggers.sql
+_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS NotifyOrderReady
+AFTER UPDATE ON Kitchen_Status
+FOR EACH ROW WHEN NEW.current_status = 'Ready'
+BEGIN
+    INSERT INTO Notification (notification_id, message, generated_at, is_read, order_id, prep_id)
+    VALUES (CONCAT('N', SUBSTR(REPLACE(UUID(), '-', ''), 1, 19)), CONCAT('Order ', NEW.order_id, ' is ready for pickup!'), NOW(), FALSE, NEW.order_id, NEW.prep_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS CheckReorderLevel_Open
+AFTER UPDATE ON Inventory
+FOR EACH ROW WHEN NEW.quantity <= NEW.reorder_level AND OLD.quantity > OLD.reorder_level
+BEGIN
+    INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+    VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+    ON CONFLICT DO UPDATE SET
+        item_name = NEW.item_name, quantity = NEW.quantity, reorder_level = NEW.reorder_level,
+        is_open = TRUE, raised_at = NOW(), updated_at = NOW(), resolved_at = NULL;
+    INSERT INTO Notification (notification_id, message, generated_at, is_read)
+    VALUES (CONCAT('N', SUBSTR(REPLACE(UUID(), '-', ''), 1, 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+END;
+
+CREATE TRIGGER IF NOT EXISTS CheckReorderLevel_Track
+AFTER UPDATE ON Inventory
+FOR EACH ROW WHEN NEW.quantity <= NEW.reorder_level AND OLD.quantity <= OLD.reorder_level
+    AND (NEW.quantity <> OLD.quantity OR NEW.reorder_level <> OLD.reorder_level)
+BEGIN
+    INSERT INTO Notification (notification_id, message, generated_at, is_read)
+    SELECT CONCAT('N', SUBSTR(REPLACE(UUID(), '-', ''), 1, 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE
+    WHERE NOT EXISTS (SELECT 1 FROM Low_Stock_Alert WHERE inventory_id = NEW.inventory_id);
+    INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+    VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+    ON CONFLICT DO UPDATE SET quantity = NEW.quantity, reorder_level = NEW.reorder_level, updated_at = NOW();
+END;
+
+CREATE TRIGGER IF NOT EXISTS CheckReorderLevel_Close
+AFTER UPDATE ON Inventory
+FOR EACH ROW WHEN NEW.quantity > NEW.reorder_level AND OLD.quantity <= OLD.reorder_level
+BEGIN
+    UPDATE Low_Stock_Alert
+    SET quantity = NEW.quantity, is_open = FALSE, updated_at = NOW(), resolved_at = NOW()
+    WHERE inventory_id = NEW.inventory_id AND is_open = TRUE;
+END;
+"""
+
+
+def translate_sql(sql):
+    """Rewrites the MySQL constructs the app uses into SQLite."""
+    for pattern, replacement in _SQL_REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _schema_statements(path=SCHEMA_FILE):
+    """CREATE TABLE statements from the MySQL schema script, as SQLite DDL."""
+    with open(path, encoding='utf-8') as f:
+        script = f.read()
+    # Everything after the tables is MySQL-only (DELIMITER blocks, functions, procedures)
+    script = script.split('--TRIGGERS', 1)[0]
+
+    statements = []
+    for statement in script.split(';'):
+        statement = statement.strip()
+        table = _TABLE_NAME.match(statement)
+        if not table:
+            continue
+        indexes = _INLINE_INDEX.findall(statement)
+        statement = _INLINE_INDEX.sub('', statement)
+        statements.append(statement.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1))
+        for name, columns in indexes:
+            statements.append(f'CREATE INDEX IF NOT EXISTS {name} ON {table.group(1)} ({columns})')
+    return statements
+
+
+def _translate_errors(func):
+    """Re-raises sqlite3 errors as the mysql.connector errors the handlers catch."""
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.IntegrityError as err:
+            raise mysql.connector.errors.IntegrityError(msg=str(err))
+        except sqlite3.Error as err:
+            raise mysql.connector.errors.DatabaseError(msg=str(err))
+    return wrapper
+
+
+class SQLiteCursor:
+    """DB-API cursor in the shape of mysql.connector / PyMySQL cursors."""
+
+    def __init__(self, cursor, dictionary):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((col[0] for col in self._cursor.description), row))
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @_translate_errors
+    def execute(self, sql, params=None):
+        self._cursor.execute(translate_sql(sql), tuple(params or ()))
+        return self._cursor.rowcount
+
+    @_translate_errors
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(translate_sql(sql), [tuple(params) for params in seq_params])
+        return self._cursor.rowcount
+
+    @_translate_errors
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    @_translate_errors
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    @_translate_errors
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """Wraps a sqlite3 connection with the begin/commit/rollback/cursor API the handlers use."""
+
+    def __init__(self, connection, dictionary):
+        self._connection = connection
+        self._dictionary = dictionary
+
+    def cursor(self, dictionary=None, **kwargs):
+        return SQLiteCursor(self._connection.cursor(), self._dictionary if dictionary is None else dictionary)
+
+    @_translate_errors
+    def begin(self):
+        if not self._connection.in_transaction:
+            self._connection.execute('BEGIN')
+
+    @_translate_errors
+    def commit(self):
+        self._connection.commit()
+
+    @_translate_errors
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _now():
+    return datetime.now().strftime(DATETIME_FORMAT)
+
+
+def _concat(*args):
+    # MySQL CONCAT() is NULL if any argument is NULL
+    if any(arg is None for arg in args):
+        return None
+    return ''.join(str(arg) for arg in args)
+
+
+def _regexp(pattern, value):
+    return value is not None and re.search(pattern, str(value)) is not None
+
+
+sqlite3.register_adapter(datetime, lambda value: value.strftime(DATETIME_FORMAT))
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter('DATETIME', lambda value: datetime.strptime(value.decode()[:19], DATETIME_FORMAT))
+sqlite3.register_converter('DECIMAL', lambda value: Decimal(value.decode()))
+
+
+class SQLiteBackend(StorageBackend):
+    """Embedded SQLite database file; host/port are ignored, there are no replicas."""
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        connection = self._open()
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            for statement in _schema_statements():
+                connection.execute(statement)
+            connection.executescript(_EXTRA_TABLES + _TRIGGERS)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     check_same_thread=False)
+        connection.execute('PRAGMA foreign_keys = ON')
+        connection.create_function('NOW', 0, _now)
+        connection.create_function('UUID', 0, lambda: str(uuid.uuid1()))
+        connection.create_function('CONCAT', -1, _concat, deterministic=True)
+        connection.create_function('REGEXP', 2, _regexp, deterministic=True)
+        return connection
+
+    @_translate_errors
+    def connect(self, host=None, port=None):
+        return SQLiteConnection(self._open(), dictionary=False)
+
+    @_translate_errors
+    def connect_dict(self, host=None, port=None, unbuffered=False):
+        return SQLiteConnection(self._open(), dictionary=True)
+
+
+def create_storage(name=None, **mysql_config):
+    """Builds the backend named by STORAGE_BACKEND."""
+    name = (name or os.getenv('STORAGE_BACKEND', 'mysql')).lower()
+    if name == 'mysql':
+        return MySQLBackend(**mysql_config)
+    if name == 'sqlite':
+        return SQLiteBackend(os.getenv('SQLITE_PATH', 'pesu_food_systems.sqlite3'))
+    raise ValueError(f"Unsupported STORAGE_BACKEND: {name}")
@@ -0,0 +1,251 @@
+"""
+In-process background work for things that should happen after a commit.
+
+Handlers call add_to_outbox(cursor, event, payload) inside their own transaction. That
+writes one Task_Outbox row per hook registered for the event, so the work is recorded
+exactly when the order is. After commit, dispatch(tasks) hands the rows to a pool of
+worker threads through a bounded queue. A task row is deleted once its hook succeeds.
+A failing hook is retried with exponential backoff up to max_attempts, then marked Failed.
+
+Rows are leased (lease_id, claimed_until) by whoever queued them. A poller picks up rows
+that are due for a retry, rows whose lease expired because a worker died or the server
+restarted, and rows that did not fit in the queue. Nothing is lost on restart. A worker
+renews the lease when it takes a task off the queue and skips the task if the lease has
+moved on, so a task re-claimed while it sat in a long queue still runs only once.
+"""
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueue:
+
+    def __init__(self, connect, workers=2, max_queue=1000, max_attempts=5, backoff=2.0,
+                 lease_seconds=60, poll_interval=2.0):
+        """
+        connect() must return a mysql.connector style connection (cursor(dictionary=True)), or None.
+        A failed task waits about backoff seconds before its first retry, doubling after each attempt.
+        """
+        self.connect = connect
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = timedelta(seconds=lease_seconds)
+        self.poll_interval = poll_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._hooks = {}  # event -> [hook]
+        self._hooks_by_name = {}
+        self._in_flight = 0
+        self._started = False
+        self._lock = threading.Lock()
+        self.stats = {'completed': 0, 'retried': 0, 'failed': 0, 'overflowed': 0, 'stale': 0}
+
+    def register(self, event):
+        """Decorator: run the function with the event payload after every commit of that event."""
+        def decorator(hook):
+            name = hook.__qualname__
+            if name in self._hooks_by_name:
+                raise ValueError(f'Hook {name} is already registered')
+            self._hooks_by_name[name] = hook
+            self._hooks.setdefault(event, []).append(hook)
+            return hook
+        return decorator
+
+    def add_to_outbox(self, cursor, event, payload):
+        """Writes the event's tasks with the caller's cursor, inside the caller's transaction."""
+        hooks = self._hooks.get(event, [])
+        if not hooks:
+            return []
+        now = datetime.now()
+        tasks = [{
+            'task_id': uuid.uuid4().hex,
+            'event': event,
+            'hook': hook.__qualname__,
+            'payload': json.dumps(payload, default=str),
+            'attempts': 0,
+            'lease_id': uuid.uuid4().hex,
+        } for hook in hooks]
+        cursor.executemany(
+            "INSERT INTO Task_Outbox (task_id, event, hook, payload, status, attempts, next_attempt_at, lease_id, claimed_until, created_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            [(t['task_id'], t['event'], t['hook'], t['payload'], 'Pending', 0, now, t['lease_id'], now + self.lease, now)
+             for t in tasks]
+        )
+        return tasks
+
+    def dispatch(self, tasks):
+        """Queues freshly committed tasks. If the queue is full they are left for the poller."""
+        overflow = []
+        for task in tasks:
+            try:
+                self._queue.put_nowait(task)
+            except queue.Full:
+                overflow.append(task['task_id'])
+        if overflow:
+            self._count('overflowed', len(overflow))
+            # Drop the lease so the poller can pick them up as soon as there is room
+            self._execute_many("UPDATE Task_Outbox SET lease_id = NULL, claimed_until = NULL WHERE task_id = %s",
+                               [(task_id,) for task_id in overflow])
+
+    def start(self):
+        """Starts the workers and the outbox poller (once per process)."""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f'task-worker-{i}', daemon=True).start()
+        threading.Thread(target=self._poll, name='task-outbox-poller', daemon=True).start()
+
+    def metrics(self):
+        """Queue depth and counters for this process, plus outbox totals from the database."""
+        data = {
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'in_flight': self._in_flight,
+            'workers': self.workers if self._started else 0,
+            **self.stats,
+            'outbox': None,
+        }
+        connection = self.connect()
+        if connection:
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute("SELECT status, COUNT(*) AS tasks FROM Task_Outbox GROUP BY status")
+                data['outbox'] = {row['status']: row['tasks'] for row in cursor.fetchall()}
+            except Exception as err:
+                logger.warning("Task outbox metrics failed: %s", err)
+            finally:
+                connection.close()
+        return data
+
+    def _count(self, stat, n=1):
+        with self._lock:
+            self.stats[stat] += n
+
+    def _execute_many(self, sql, rows):
+        connection = self.connect()
+        if not connection:
+            logger.warning("Task outbox update skipped, no database connection")
+            return None
+        try:
+            cursor = connection.cursor()
+            cursor.executemany(sql, rows)
+            connection.commit()
+            return cursor.rowcount
+        except Exception as err:
+            logger.warning("Task outbox update failed: %s", err)
+            connection.rollback()
+            return None
+        finally:
+            connection.close()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            with self._lock:
+                self._in_flight += 1
+            try:
+                self._process(task)
+            except Exception:
+                logger.exception("Task %s crashed the worker loop", task['task_id'])
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._queue.task_done()
+
+    def _process(self, task):
+        if self._renew_lease(task):
+            self._run(task)
+        else:
+            self._count('stale')
+
+    def _renew_lease(self, task):
+        """Swaps the task's lease for a fresh one; False if another claim has replaced it."""
+        lease_id = uuid.uuid4().hex
+        renewed = self._execute_many(
+            "UPDATE Task_Outbox SET lease_id = %s, claimed_until = %s "
+            "WHERE task_id = %s AND lease_id = %s AND status = 'Pending'",
+            [(lease_id, datetime.now() + self.lease, task['task_id'], task['lease_id'])]
+        )
+        if not renewed:
+            return False
+        task['lease_id'] = lease_id
+        return True
+
+    def _run(self, task):
+        hook = self._hooks_by_name.get(task['hook'])
+        try:
+            if hook is None:
+                raise LookupError(f"No hook named {task['hook']} is registered")
+            hook(json.loads(task['payload']))
+        except Exception as err:
+            self._retry(task, err)
+            return
+        self._execute_many("DELETE FROM Task_Outbox WHERE task_id = %s", [(task['task_id'],)])
+        self._count('completed')
+
+    def _retry(self, task, err):
+        attempts = task['attempts'] + 1
+        error = f'{type(err).__name__}: {err}'[:255]
+        if attempts >= self.max_attempts:
+            logger.error("Task %s (%s) failed permanently after %d attempts: %s", task['task_id'], task['hook'], attempts, error)
+            self._count('failed')
+            status, next_attempt_at = 'Failed', datetime.now()
+        else:
+            delay = self.backoff * 2 ** (attempts - 1) * (0.5 + random.random())
+            logger.warning("Task %s (%s) failed, retry %d in %.1fs: %s", task['task_id'], task['hook'], attempts, delay, error)
+            self._count('retried')
+            status, next_attempt_at = 'Pending', datetime.now() + timedelta(seconds=delay)
+        self._execute_many(
+            "UPDATE Task_Outbox SET status = %s, attempts = %s, next_attempt_at = %s, lease_id = NULL, claimed_until = NULL, "
+            "last_error = %s WHERE task_id = %s AND lease_id = %s",
+            [(status, attempts, next_attempt_at, error, task['task_id'], task['lease_id'])]
+        )
+
+    def _poll(self):
+        while True:
+            try:
+                self._claim_due_tasks()
+            except Exception as err:
+                logger.warning("Task outbox poll failed: %s", err)
+            time.sleep(self.poll_interval)
+
+    def _claim_due_tasks(self):
+        room = self._queue.maxsize - self._queue.qsize()
+        if room <= 0:
+            return
+        connection = self.connect()
+        if not connection:
+            return
+        try:
+            cursor = connection.cursor(dictionary=True)
+            now = datetime.now()
+            cursor.execute(
+                "SELECT task_id, event, hook, payload, attempts FROM Task_Outbox "
+                "WHERE status = 'Pending' AND next_attempt_at <= %s AND (claimed_until IS NULL OR claimed_until < %s) "
+                "ORDER BY next_attempt_at LIMIT %s",
+                (now, now, room)
+            )
+            for task in cursor.fetchall():
+                # Another process may be polling too; only the one whose UPDATE matches owns the task
+                task = dict(task, lease_id=uuid.uuid4().hex)
+                cursor.execute(
+                    "UPDATE Task_Outbox SET lease_id = %s, claimed_until = %s "
+                    "WHERE task_id = %s AND status = 'Pending' AND (claimed_until IS NULL OR claimed_until < %s)",
+                    (task['lease_id'], now + self.lease, task['task_id'], now)
+                )
+                connection.commit()
+                if cursor.rowcount == 1:
+                    self._queue.put(task)
+        finally:
+            connection.close()
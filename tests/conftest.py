@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top level of the repository, next to app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app.py imported against a throwaway embedded SQLite database."""
+    os.environ['STORAGE_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = str(tmp_path_factory.mktemp('db') / 'app.sqlite3')
+    os.environ['CACHE_URL'] = 'memory://'
+    import app
+    return app
+
+
+@pytest.fixture(scope='session')
+def client(app_module):
+    """Test client with two shops, a customer and a few menu items (one without a shop)."""
+    connection = app_module.storage.connect()
+    cursor = connection.cursor()
+    cursor.execute("INSERT INTO Shop (shop_ID, shop_name, location) VALUES ('TS1', 'Test Canteen', 'A'), ('TS2', 'Test Juice', 'B')")
+    cursor.execute("INSERT INTO Customer (customer_id, name) VALUES ('TC1', 'Asha')")
+    cursor.execute("INSERT INTO Menu_Item (item_ID, item_name, price, countdown, shop_ID) VALUES "
+                   "('TI1', 'Dosa', 40, 5, 'TS1'), ('TI2', 'Juice', 25, 2, 'TS2'), ('TI3', 'Mystery', 10, 1, NULL)")
+    connection.commit()
+    connection.close()
+    return app_module.app.test_client()
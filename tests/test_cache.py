@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+import cache as cache_module
+from cache import MISSING, Cache, MemoryBackend, create_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_entries_expire_after_their_ttl(clock):
+    backend = MemoryBackend()
+    backend.set('menu:all', ['dosa'], ttl=10)
+    clock.now += 9.9
+    assert backend.get('menu:all') == ['dosa']
+    clock.now += 0.2
+    assert backend.get('menu:all') is MISSING
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1, ttl=60)
+    backend.set('b', 2, ttl=60)
+    backend.get('a')
+    backend.set('c', 3, ttl=60)
+    assert backend.get('b') is MISSING
+    assert (backend.get('a'), backend.get('c')) == (1, 3)
+
+
+def test_delete_prefix_only_drops_matching_keys(clock):
+    backend = MemoryBackend()
+    backend.set('menu:all', 1, ttl=60)
+    backend.set('menu:shop:S1', 2, ttl=60)
+    backend.set('staff:K1', 3, ttl=60)
+    backend.delete_prefix('menu:')
+    assert backend.get('menu:all') is MISSING
+    assert backend.get('menu:shop:S1') is MISSING
+    assert backend.get('staff:K1') == 3
+
+
+def test_memory_cache_get_set_invalidate():
+    cache = Cache(default_ttl=30)
+    assert cache.get('menu:all', 'default') == 'default'
+    cache.set('menu:all', [1, 2])
+    assert cache.get('menu:all') == [1, 2]
+    cache.invalidate('menu:')
+    assert cache.get('menu:all') is None
+
+
+def test_create_cache_rejects_unknown_urls():
+    with pytest.raises(ValueError):
+        create_cache('memcached://localhost')
+
+
+def test_sqlite_invalidation_reaches_other_workers(tmp_path):
+    url = f'sqlite:///{tmp_path / "cache.db"}'
+    worker_a = create_cache(url, local_ttl=60)
+    worker_b = create_cache(url, local_ttl=60)
+    worker_a.start()
+
+    worker_b.set('menu:all', 'old menu')
+    assert worker_a.get('menu:all') == 'old menu'
+    worker_b.invalidate('menu:')
+
+    deadline = time.time() + 3
+    while worker_a.local.get('menu:all') is not MISSING and time.time() < deadline:
+        time.sleep(0.05)
+    assert worker_a.get('menu:all') is None
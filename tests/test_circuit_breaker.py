@@ -0,0 +1,175 @@
+import mysql.connector
+import pymysql
+import pytest
+
+import storage
+from storage import CircuitBreaker, CircuitOpenError, MySQLBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(storage.time, 'monotonic', clock)
+    return clock
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_failures_in_a_row(clock):
+    breaker = CircuitBreaker('db:3306', failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker('db:3306', failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker('db:3306', failure_threshold=2, reset_timeout=30)
+    trip(breaker)
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.now += 1
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    breaker.before_call()
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker('db:3306', failure_threshold=2, reset_timeout=30)
+    trip(breaker)
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_abandoned_probe_is_replaced(clock):
+    breaker = CircuitBreaker('db:3306', failure_threshold=1, reset_timeout=30)
+    trip(breaker)
+    clock.now += 30
+    breaker.before_call()
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+class SlowCursor:
+    def execute(self, sql, params=None):
+        if sql != 'SELECT 1':
+            raise pymysql.err.OperationalError(2013, 'Lost connection to MySQL server during query (timed out)')
+
+    def close(self):
+        pass
+
+
+class SlowConnection:
+    def cursor(self):
+        return SlowCursor()
+
+    def close(self):
+        pass
+
+
+def test_query_timeouts_trip_the_breaker(clock):
+    backend = MySQLBackend('user', 'password', 'db', breaker_threshold=3)
+    for _ in range(3):
+        connection = backend._guarded('db', 3306, SlowConnection)
+        with pytest.raises(pymysql.err.OperationalError):
+            connection.cursor().execute('SELECT * FROM Orders')
+    assert backend.breaker_states() == {'db:3306': 'open'}
+    with pytest.raises(CircuitOpenError):
+        backend._guarded('db', 3306, SlowConnection)
+
+
+def failing_connection(err):
+    class Cursor(SlowCursor):
+        def execute(self, sql, params=None):
+            raise err
+
+    class Connection(SlowConnection):
+        def cursor(self):
+            return Cursor()
+
+    return Connection
+
+
+@pytest.mark.parametrize('err', [
+    mysql.connector.errors.ReadTimeoutError(msg='Read timed out', errno=2013),
+    mysql.connector.errors.WriteTimeoutError(msg='Write timed out'),
+    mysql.connector.errors.OperationalError(msg='Lost connection to MySQL server during query', errno=2013),
+    mysql.connector.errors.InterfaceError(msg='Lost connection to MySQL server', errno=2055),
+])
+def test_mysql_connector_timeouts_trip_the_breaker(clock, err):
+    backend = MySQLBackend('user', 'password', 'db', breaker_threshold=1)
+    connection = backend._guarded('db', 3306, failing_connection(err))
+    with pytest.raises(type(err)):
+        connection.cursor().execute('SELECT * FROM Orders')
+    assert backend.breaker_states() == {'db:3306': 'open'}
+
+
+@pytest.mark.parametrize('err', [
+    pymysql.err.OperationalError(1213, 'Deadlock found when trying to get lock; try restarting transaction'),
+    pymysql.err.OperationalError(1205, 'Lock wait timeout exceeded; try restarting transaction'),
+    mysql.connector.errors.DatabaseError(msg='Deadlock found when trying to get lock', errno=1213),
+    mysql.connector.errors.OperationalError(msg='Lock wait timeout exceeded', errno=1205),
+])
+def test_lock_conflicts_do_not_trip_the_breaker(clock, err):
+    backend = MySQLBackend('user', 'password', 'db', breaker_threshold=1)
+    connection = backend._guarded('db', 3306, failing_connection(err))
+    with pytest.raises(type(err)):
+        connection.cursor().execute('UPDATE Inventory SET quantity = quantity - 1')
+    assert backend.breaker_states() == {'db:3306': 'closed'}
+
+
+def test_statement_errors_do_not_trip_the_breaker(clock):
+    backend = MySQLBackend('user', 'password', 'db', breaker_threshold=1)
+    err = pymysql.err.ProgrammingError(1064, 'You have an error in your SQL syntax')
+    connection = backend._guarded('db', 3306, failing_connection(err))
+    with pytest.raises(pymysql.err.ProgrammingError):
+        connection.cursor().execute('SELEC 1')
+    assert backend.breaker_states() == {'db:3306': 'closed'}
+
+
+def test_successful_query_closes_a_half_open_breaker(clock):
+    backend = MySQLBackend('user', 'password', 'db', breaker_threshold=1, breaker_reset_timeout=30)
+    connection = backend._guarded('db', 3306, SlowConnection)
+    with pytest.raises(pymysql.err.OperationalError):
+        connection.cursor().execute('SELECT * FROM Orders')
+    clock.now += 30
+    connection = backend._guarded('db', 3306, SlowConnection)
+    assert backend.breaker_states() == {'db:3306': 'half_open'}
+    connection.cursor().execute('SELECT 1')
+    assert backend.breaker_states() == {'db:3306': 'closed'}
@@ -0,0 +1,91 @@
+from db_profiler import ProfiledConnection, QueryProfile, normalize_sql
+
+
+def test_normalize_replaces_literals_and_placeholders():
+    assert normalize_sql("SELECT * FROM Menu_Item WHERE item_ID = 'I1' AND price > 10.5") == \
+        "SELECT * FROM Menu_Item WHERE item_ID = ? AND price > ?"
+    assert normalize_sql("SELECT * FROM Orders WHERE customer_id = %s") == \
+        "SELECT * FROM Orders WHERE customer_id = ?"
+    assert normalize_sql("SELECT * FROM Orders WHERE customer_id = %(customer_id)s") == \
+        "SELECT * FROM Orders WHERE customer_id = ?"
+
+
+def test_normalize_handles_escaped_quotes():
+    assert normalize_sql("SELECT 1 FROM Customer WHERE name = 'D''Souza' AND city = 'it\\'s'") == \
+        "SELECT ? FROM Customer WHERE name = ? AND city = ?"
+
+
+def test_normalize_collapses_in_lists_and_whitespace():
+    assert normalize_sql("SELECT *\n  FROM Menu_Item\n WHERE item_ID IN (%s, %s,%s);") == \
+        "SELECT * FROM Menu_Item WHERE item_ID IN (?)"
+    assert normalize_sql("SELECT * FROM Menu_Item WHERE item_ID IN ('I1', 'I2')") == \
+        normalize_sql("SELECT * FROM Menu_Item WHERE item_ID IN ('I3')")
+
+
+def test_repeated_select_is_flagged_as_n_plus_one():
+    profile = QueryProfile(n_plus_one_threshold=3)
+    for item_id in ('I1', 'I2', 'I3'):
+        profile.record(f"SELECT price FROM Menu_Item WHERE item_ID = '{item_id}'", None, 1.0)
+    profile.record("SELECT * FROM Orders WHERE order_id = %s", ('O1',), 1.0)
+    assert profile.n_plus_one() == [
+        {'sql': 'SELECT price FROM Menu_Item WHERE item_ID = ?', 'count': 3, 'total_ms': 3.0}
+    ]
+
+
+def test_writes_and_rare_selects_are_not_flagged():
+    profile = QueryProfile(n_plus_one_threshold=3)
+    for _ in range(5):
+        profile.record("INSERT INTO Order_Menu_Item (order_id, item_id) VALUES (%s, %s)", ('O1', 'I1'), 1.0)
+    profile.record("SELECT * FROM Orders WHERE order_id = %s", ('O1',), 1.0)
+    profile.record("SELECT * FROM Orders WHERE order_id = %s", ('O2',), 1.0)
+    assert profile.n_plus_one() == []
+
+
+def test_report_counts_time_and_slow_queries():
+    profile = QueryProfile(slow_query_ms=100)
+    profile.record("SELECT * FROM Orders", None, 150.0)
+    profile.record("SELECT * FROM Shop", None, 5.0)
+    report = profile.report()
+    assert report['query_count'] == 2
+    assert report['total_db_ms'] == 155.0
+    assert [s['sql'] for s in report['statements']] == ['SELECT * FROM Orders', 'SELECT * FROM Shop']
+    assert report['slow_queries'] == [{'sql': 'SELECT * FROM Orders', 'ms': 150.0}]
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def executemany(self, sql, seq_params):
+        self.executed.append((sql, list(seq_params)))
+
+    def fetchall(self):
+        return []
+
+
+class FakeConnection:
+    def cursor(self):
+        return FakeCursor()
+
+
+def test_profiled_connection_records_every_statement():
+    profile = QueryProfile()
+    cursor = ProfiledConnection(FakeConnection(), profile).cursor()
+    cursor.execute("SELECT * FROM Shop WHERE shop_ID = %s", ('S1',))
+    cursor.executemany("INSERT INTO Shop (shop_ID) VALUES (%s)", [('S2',), ('S3',)])
+    assert cursor.fetchall() == []
+    assert profile.query_count == 2
+    assert set(profile.statements) == {'SELECT * FROM Shop WHERE shop_ID = ?', 'INSERT INTO Shop (shop_ID) VALUES (?)'}
+
+
+def test_profile_header_needs_the_configured_token(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'DB_PROFILE', False)
+    monkeypatch.setattr(app_module, 'DB_PROFILE_TOKEN', None)
+    assert 'X-DB-Query-Count' not in client.get('/api/menu', headers={'X-Profile-DB': '1'}).headers
+
+    monkeypatch.setattr(app_module, 'DB_PROFILE_TOKEN', 's3cret')
+    assert 'X-DB-Query-Count' not in client.get('/api/menu', headers={'X-Profile-DB': '1'}).headers
+    assert 'X-DB-Query-Count' in client.get('/api/menu', headers={'X-Profile-DB': 's3cret'}).headers
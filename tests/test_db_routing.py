@@ -0,0 +1,75 @@
+import mysql.connector
+import pytest
+
+from storage import MySQLBackend
+
+
+def test_failed_replica_connect_falls_back_to_the_primary(app_module, monkeypatch):
+    replica = ('replica', 3307)
+    monkeypatch.setattr(app_module, 'choose_db_host', lambda route: replica)
+    monkeypatch.setattr(app_module, '_replica_lag', {})
+    attempts = []
+
+    def connect(host, port):
+        attempts.append((host, port))
+        if (host, port) == replica:
+            raise mysql.connector.errors.InterfaceError(msg="Can't connect to MySQL server")
+        return 'primary connection'
+
+    assert app_module._connect_with_fallback('read_only', connect) == 'primary connection'
+    assert attempts == [replica, app_module.DB_PRIMARY]
+    # The replica is treated as unhealthy until its next lag check
+    assert app_module._replica_lag[replica][1] is None
+
+
+def test_failed_primary_connect_is_not_retried(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'choose_db_host', lambda route: app_module.DB_PRIMARY)
+
+    def connect(host, port):
+        raise mysql.connector.errors.InterfaceError(msg="Can't connect to MySQL server")
+
+    with pytest.raises(mysql.connector.errors.InterfaceError):
+        app_module._connect_with_fallback('write', connect)
+
+
+class ExhaustedPool:
+    def __init__(self, free_after=None):
+        self.calls = 0
+        self.free_after = free_after
+
+    def get_connection(self):
+        self.calls += 1
+        if self.free_after is not None and self.calls > self.free_after:
+            return 'pooled connection'
+        raise mysql.connector.errors.PoolError(msg='Failed getting connection; pool exhausted')
+
+
+def test_exhausted_pool_waits_then_fails_without_tripping_the_breaker(monkeypatch):
+    backend = MySQLBackend('user', 'password', 'db', pool_timeout=0.05, breaker_threshold=1)
+    monkeypatch.setattr(backend, '_get_pool', lambda host, port: ExhaustedPool())
+    with pytest.raises(mysql.connector.errors.PoolError):
+        backend.connect('db', 3306)
+    assert backend.breaker_states() == {'db:3306': 'closed'}
+
+
+def test_exhausted_pool_hands_out_a_connection_once_one_is_returned(monkeypatch):
+    backend = MySQLBackend('user', 'password', 'db', pool_timeout=1)
+    pool = ExhaustedPool(free_after=3)
+    monkeypatch.setattr(backend, '_get_pool', lambda host, port: pool)
+    assert backend.connect('db', 3306)._connection == 'pooled connection'
+    assert pool.calls == 4
+
+
+@pytest.mark.parametrize('path', ['/api/menu', '/menu_items/TS1', '/api/admin/active-orders?shop_id=TS1'])
+def test_cache_fills_read_from_the_primary(app_module, client, monkeypatch, path):
+    routes = []
+    choose_db_host = app_module.choose_db_host
+
+    def spy(route):
+        routes.append(route)
+        return choose_db_host(route)
+
+    monkeypatch.setattr(app_module, 'choose_db_host', spy)
+    app_module.cache.invalidate('')
+    assert client.get(path).status_code == 200
+    assert routes and set(routes) == {'write'}
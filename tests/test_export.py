@@ -0,0 +1,34 @@
+import pytest
+
+
+def test_export_streams_csv(client):
+    order_id = client.post('/place_order', json={
+        'customer_id': 'TC1', 'items': [{'item_ID': 'TI1', 'quantity': 1}]
+    }).json['order_id']
+    response = client.get('/api/admin/export/orders?shop_id=TS1')
+    assert response.headers['Content-Disposition'] == 'attachment; filename="orders_TS1.csv"'
+    body = response.get_data(as_text=True)
+    assert body.startswith('order_id,order_time,status,quantity,pickup_time,total_amount,customer_id,shop_id')
+    assert order_id in body
+
+
+def test_export_aborts_on_a_stream_error(app_module, client, monkeypatch):
+    def broken_stream(cursor, columns):
+        yield 'order_id\n'
+        raise RuntimeError('connection lost')
+
+    monkeypatch.setattr(app_module, '_stream_csv', broken_stream)
+    response = client.get('/api/admin/export/orders', buffered=False)
+    with pytest.raises(RuntimeError):
+        response.get_data()
+
+
+def test_date_filter_columns_are_indexed(app_module, client):
+    connection = app_module.get_db_connection(route='write')
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        indexes = {row[0] for row in cursor.fetchall()}
+    finally:
+        connection.close()
+    assert {'idx_orders_time', 'idx_payment_time'} <= indexes
@@ -0,0 +1,126 @@
+from decimal import Decimal
+
+import pytest
+
+
+@pytest.fixture
+def validate(app_module):
+    return app_module._validate_catalogue
+
+
+def row(**fields):
+    base = {'item_ID': 'I1', 'item_name': 'Dosa', 'price': '40.50', 'shop_ID': 'S1', 'shop_name': 'Canteen'}
+    base.update(fields)
+    return base
+
+
+def test_valid_rows_are_ready_for_insert(validate):
+    shops, menu_items, inventory, errors = validate([
+        row(location='Block A', quantity='20', unit='kg'),
+        row(item_ID='I2', item_name='Idli', price=30, shop_name=''),
+    ])
+    assert errors == []
+    assert shops == [('S1', 'Canteen', 'Block A')]
+    assert menu_items == [
+        ('I1', 'Dosa', 0, 0, Decimal('40.50'), 'S1'),
+        ('I2', 'Idli', 0, 0, Decimal('30'), 'S1'),
+    ]
+    assert inventory == [('I1', 'Dosa', 20, True, 10, 'kg', 'I1')]
+
+
+@pytest.mark.parametrize('price, message', [
+    ('NaN', "price must be a number, got 'NaN'"),
+    ('Infinity', "price must be a number, got 'Infinity'"),
+    ('abc', "price must be a number, got 'abc'"),
+    ('0', 'price must be > 0'),
+    ('10000', 'price must be at most 9999.99'),
+    ('10.555', 'price must have at most 2 decimal places'),
+    ('', 'price is required'),
+])
+def test_bad_prices(validate, price, message):
+    _, _, _, errors = validate([row(price=price)])
+    assert len(errors) == 1
+    assert message in errors[0]
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({'item_name': ''}, 'item_ID, item_name and shop_ID are required'),
+    ({'item_ID': 'I' * 11}, 'item_ID/shop_ID must be at most 10 characters'),
+    ({'countdown': '-1'}, 'countdown must be >= 0'),
+    ({'shop_name': 'x' * 101}, 'shop_name and location must be at most 100 characters'),
+    ({'quantity': '5', 'unit': 'litres'}, 'unit must be one of'),
+    ({'quantity': '-5'}, 'quantity must be >= 0'),
+    ({'quantity': '3.7'}, "quantity must be a number, got '3.7'"),
+    ({'quantity': 3.7}, 'quantity must be a number, got 3.7'),
+    ({'delay': 2.5}, 'delay must be a number, got 2.5'),
+    ({'quantity': '5', 'inventory_id': 'INV' * 4}, 'inventory_id must be at most 10 characters'),
+])
+def test_bad_fields(validate, fields, message):
+    _, _, _, errors = validate([row(**fields)])
+    assert len(errors) == 1
+    assert message in errors[0]
+
+
+def test_duplicates_within_the_file(validate):
+    _, _, _, errors = validate([
+        row(quantity='5'),
+        row(),
+        row(item_ID='I2', quantity='5', inventory_id='INV2'),
+    ])
+    assert errors == ['row 3: duplicate item_ID I1', 'row 4: duplicate inventory item_name Dosa']
+
+    _, _, _, errors = validate([
+        row(quantity='5'),
+        row(item_ID='i1'),
+        row(item_ID='I2', quantity='5', inventory_name='DOSA', inventory_id='INV2'),
+    ])
+    assert errors == ['row 3: duplicate item_ID i1', 'row 4: duplicate inventory item_name DOSA']
+
+
+def test_stock_rows_cannot_take_over_another_items_inventory(validate):
+    existing_inventory = [('I1', 'Dosa batter', 'M1')]
+    _, _, inventory, errors = validate(
+        [row(item_ID='M9', shop_ID='S2', shop_name='Juice', quantity='99', inventory_name='dosa Batter')],
+        existing_inventory=existing_inventory,
+    )
+    assert errors == ["row 2: inventory_name 'dosa Batter' already belongs to inventory I1 of item M1"]
+    assert inventory == []
+
+    _, _, _, errors = validate([row(item_ID='M9', quantity='5', inventory_id='i1')], existing_inventory=existing_inventory)
+    assert errors == ["row 2: inventory_id 'i1' already belongs to inventory I1 of item M1"]
+
+    _, _, _, errors = validate([row(item_ID='m1', quantity='5', inventory_id='I2')], existing_inventory=existing_inventory)
+    assert errors == ["row 2: item_ID 'm1' already belongs to inventory I1 of item M1"]
+
+    # Restocking the same item under its own inventory row is an update, not a clash
+    _, _, inventory, errors = validate(
+        [row(item_ID='M1', quantity='60', inventory_name='Dosa batter', inventory_id='I1')],
+        existing_inventory=existing_inventory,
+    )
+    assert errors == []
+    assert inventory[0][2] == 60
+
+
+def test_shop_must_exist_in_the_file_or_the_database(validate):
+    _, _, _, errors = validate([row(shop_ID='S9', shop_name='')])
+    assert errors == ['shop S9 is not in the database, add a shop_name to one of its rows']
+
+    _, _, _, errors = validate([row(shop_ID='S9', shop_name='')], existing_shops={'S9': 'Juice Bar'})
+    assert errors == []
+
+
+def test_shop_names_must_be_unique(validate):
+    _, _, _, errors = validate([row(), row(item_ID='I2', shop_ID='S2', shop_name='canteen')])
+    assert errors == ["shop S2: shop_name 'canteen' is already used by shop S1"]
+
+    _, _, _, errors = validate([row(shop_ID='S2')], existing_shops={'S1': 'Canteen'})
+    assert errors == ["shop S2: shop_name 'Canteen' is already used by shop S1"]
+
+    # Renaming a shop to its own current name is fine
+    _, _, _, errors = validate([row()], existing_shops={'S1': 'Canteen'})
+    assert errors == []
+
+
+def test_one_shop_id_with_two_names(validate):
+    _, _, _, errors = validate([row(), row(item_ID='I2', shop_name='Other')])
+    assert errors == ["row 3: shop S1 already has shop_name 'Canteen', got 'Other'"]
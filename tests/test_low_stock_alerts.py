@@ -0,0 +1,86 @@
+"""Low_Stock_Alert transitions of the CheckReorderLevel trigger (as emulated on SQLite)."""
+import pytest
+
+from storage import SQLiteBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteBackend(str(tmp_path / 'pesu.sqlite3'))
+
+
+def run(backend, sql, params=None, fetch=False):
+    connection = backend.connect_dict()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall() if fetch else None
+        connection.commit()
+        return rows
+    finally:
+        connection.close()
+
+
+class TestReorderTriggers:
+
+    @pytest.fixture(autouse=True)
+    def stock(self, backend):
+        self.backend = backend
+        run(backend, "INSERT INTO Shop (shop_ID, shop_name) VALUES ('S1', 'Canteen')")
+        run(backend, "INSERT INTO Menu_Item (item_ID, item_name, price, shop_ID) VALUES ('I1', 'Dosa', 40, 'S1')")
+        run(backend, "INSERT INTO Inventory (inventory_id, item_name, quantity, reorder_level, item_ID) "
+                     "VALUES ('INV1', 'Dosa Batter', 50, 10, 'I1')")
+
+    def set_quantity(self, quantity):
+        run(self.backend, "UPDATE Inventory SET quantity = %s WHERE inventory_id = 'INV1'", (quantity,))
+
+    def alert(self):
+        rows = run(self.backend, "SELECT quantity, is_open, resolved_at FROM Low_Stock_Alert WHERE inventory_id = 'INV1'",
+                   fetch=True)
+        return rows[0] if rows else None
+
+    def notifications(self):
+        return run(self.backend, "SELECT COUNT(*) AS n FROM Notification WHERE message = 'Reorder needed for Dosa Batter'",
+                   fetch=True)[0]['n']
+
+    def test_no_alert_above_the_reorder_level(self):
+        self.set_quantity(20)
+        assert self.alert() is None
+        assert self.notifications() == 0
+
+    def test_drop_to_the_reorder_level_opens_one_alert(self):
+        self.set_quantity(10)
+        assert self.alert()['is_open'] == 1
+        assert self.notifications() == 1
+
+    def test_further_drops_update_the_open_alert_without_notifying(self):
+        self.set_quantity(8)
+        self.set_quantity(5)
+        self.set_quantity(2)
+        alert = self.alert()
+        assert (alert['quantity'], alert['is_open']) == (2, 1)
+        assert self.notifications() == 1
+
+    def test_restock_closes_and_rearms_the_alert(self):
+        self.set_quantity(5)
+        self.set_quantity(30)
+        alert = self.alert()
+        assert (alert['quantity'], alert['is_open']) == (30, 0)
+        assert alert['resolved_at'] is not None
+
+        self.set_quantity(9)
+        alert = self.alert()
+        assert (alert['quantity'], alert['is_open'], alert['resolved_at']) == (9, 1, None)
+        assert self.notifications() == 2
+
+    def test_item_loaded_already_low_gets_an_alert_on_its_next_change(self):
+        run(self.backend, "INSERT INTO Menu_Item (item_ID, item_name, price, shop_ID) VALUES ('I2', 'Tea', 10, 'S1')")
+        run(self.backend, "INSERT INTO Inventory (inventory_id, item_name, quantity, reorder_level, item_ID) "
+                          "VALUES ('INV2', 'Tea Leaves', 3, 10, 'I2')")
+        run(self.backend, "UPDATE Inventory SET quantity = 2 WHERE inventory_id = 'INV2'")
+        run(self.backend, "UPDATE Inventory SET quantity = 1 WHERE inventory_id = 'INV2'")
+        rows = run(self.backend, "SELECT quantity, is_open FROM Low_Stock_Alert WHERE inventory_id = 'INV2'", fetch=True)
+        assert rows == [{'quantity': 1, 'is_open': 1}]
+        notified = run(self.backend, "SELECT COUNT(*) AS n FROM Notification WHERE message = 'Reorder needed for Tea Leaves'",
+                       fetch=True)
+        assert notified == [{'n': 1}]
@@ -0,0 +1,56 @@
+"""Ordering through the API, in-process on the embedded SQLite backend."""
+import pytest
+
+
+def place(client, items, **fields):
+    return client.post('/place_order', json={'customer_id': 'TC1', 'items': items, **fields})
+
+
+def test_single_shop_order(client):
+    response = place(client, [{'item_ID': 'TI1', 'quantity': 2}])
+    assert response.status_code == 200
+    assert response.json['financial_summary']['total_amount'] == 80.0
+    assert response.json['order_ids'] == [response.json['order_id']]
+
+
+def test_multi_shop_cart_is_split_per_shop(client):
+    response = place(client, [{'item_ID': 'TI1', 'quantity': 1}, {'item_ID': 'TI2', 'quantity': 2}])
+    assert response.status_code == 200
+    assert len(response.json['order_ids']) == 2
+    assert {o['order_summary']['shop_id'] for o in response.json['orders']} == {'TS1', 'TS2'}
+    assert response.json['financial_summary']['total_amount'] == 90.0
+
+    orders = client.get('/api/customer/my-orders/TC1').json['orders']
+    totals = {o['order_id']: o['total_amount'] for o in orders}
+    assert [totals[order_id] for order_id in response.json['order_ids']] == [40.0, 50.0]
+
+
+def test_item_id_spellings_are_merged(client):
+    response = place(client, [{'item_ID': 'TI1', 'quantity': 1}, {'item_ID': 'ti1', 'quantity': 2}])
+    assert response.status_code == 200
+    assert response.json['order_items'] == [{
+        'item_id': 'TI1', 'item_name': 'Dosa', 'quantity': 3, 'unit_price': 40.0, 'total_price': 120.0,
+        'preparation_time_per_unit': 5, 'total_preparation_time': 15,
+    }]
+
+
+@pytest.mark.parametrize('items, fields', [
+    ([], {}),
+    ([{'item_ID': 'TI1', 'quantity': 0}], {}),
+    ([{'item_ID': 'NOPE', 'quantity': 1}], {}),
+    ([{'item_ID': 'TI3', 'quantity': 1}], {}),
+    ([{'item_ID': 'TI1', 'quantity': 1}], {'payment_mode': 'Barter'}),
+])
+def test_invalid_orders_are_rejected(client, items, fields):
+    assert place(client, items, **fields).status_code == 400
+
+
+def test_ready_status_notifies_the_customer(client):
+    order = place(client, [{'item_ID': 'TI2', 'quantity': 1}]).json
+    response = client.post('/api/admin/update-status', json={
+        'prep_id': order['order_summary']['preparation_id'], 'new_status': 'Ready'
+    })
+    assert response.status_code == 200
+    notifications = client.get('/api/customer/notifications/TC1').json
+    assert order['order_id'] in str(notifications)
+    assert client.post('/api/admin/update-status', json={'prep_id': 'NOPE', 'new_status': 'Ready'}).status_code == 404
@@ -0,0 +1,74 @@
+import mysql.connector
+import pytest
+
+from storage import SQLiteBackend, _schema_statements, translate_sql
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteBackend(str(tmp_path / 'pesu.sqlite3'))
+
+
+def run(backend, sql, params=None, fetch=False):
+    connection = backend.connect_dict()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall() if fetch else None
+        connection.commit()
+        return rows
+    finally:
+        connection.close()
+
+
+def test_translate_date_sub():
+    assert translate_sql("WHERE O.order_time >= DATE_SUB(NOW(), INTERVAL 24 HOUR)") == \
+        "WHERE O.order_time >= datetime(NOW(), '-24 hours')"
+    assert translate_sql("DATE_SUB(NOW(), INTERVAL 7 DAYS)") == "datetime(NOW(), '-7 days')"
+
+
+def test_translate_group_concat_separator():
+    assert translate_sql("GROUP_CONCAT(O.order_id SEPARATOR ',') as ready_orders") == \
+        "GROUP_CONCAT(O.order_id, ',') as ready_orders"
+
+
+def test_translate_on_duplicate_key_update():
+    sql = ("INSERT INTO Shop (shop_ID, shop_name) VALUES (%s, %s) "
+           "ON DUPLICATE KEY UPDATE shop_name = VALUES(shop_name)")
+    assert translate_sql(sql) == \
+        "INSERT INTO Shop (shop_ID, shop_name) VALUES (?, ?) ON CONFLICT DO UPDATE SET shop_name = excluded.shop_name"
+
+
+def test_schema_moves_inline_indexes_out_of_create_table():
+    statements = _schema_statements()
+    assert any(s.startswith('CREATE TABLE IF NOT EXISTS Low_Stock_Alert') for s in statements)
+    assert 'CREATE INDEX IF NOT EXISTS idx_open_alerts ON Low_Stock_Alert (is_open, raised_at)' in statements
+    assert not any('INDEX idx' in s for s in statements if s.startswith('CREATE TABLE'))
+
+
+def test_translated_statements_run(backend):
+    upsert = ("INSERT INTO Shop (shop_ID, shop_name, location) VALUES (%s, %s, %s) "
+              "ON DUPLICATE KEY UPDATE shop_name = VALUES(shop_name), location = VALUES(location)")
+    run(backend, upsert, ('S1', 'Canteen', 'Block A'))
+    run(backend, upsert, ('S1', 'Main Canteen', 'Block B'))
+    run(backend, upsert, ('S2', 'Juice Bar', 'Block B'))
+    assert run(backend, "SELECT shop_name FROM Shop WHERE shop_ID = 'S1'", fetch=True) == [{'shop_name': 'Main Canteen'}]
+
+    rows = run(backend, "SELECT GROUP_CONCAT(shop_ID SEPARATOR ',') AS shops FROM Shop WHERE location = %s",
+               ('Block B',), fetch=True)
+    assert sorted(rows[0]['shops'].split(',')) == ['S1', 'S2']
+
+    run(backend, "INSERT INTO Customer (customer_id, name) VALUES ('C1', 'Asha')")
+    run(backend, "INSERT INTO Orders (order_id, order_time, status, quantity, total_amount, customer_id, shop_id) "
+                 "VALUES ('OLD', datetime('now', 'localtime', '-2 days'), 'Pending', 1, 10, 'C1', 'S1'), "
+                 "('NEW', NOW(), 'Pending', 1, 10, 'C1', 'S1')")
+    rows = run(backend, "SELECT order_id FROM Orders WHERE order_time >= DATE_SUB(NOW(), INTERVAL 24 HOUR)", fetch=True)
+    assert rows == [{'order_id': 'NEW'}]
+
+
+def test_sqlite_errors_are_raised_as_mysql_connector_errors(backend):
+    run(backend, "INSERT INTO Shop (shop_ID, shop_name) VALUES ('S1', 'Canteen')")
+    with pytest.raises(mysql.connector.errors.IntegrityError):
+        run(backend, "INSERT INTO Shop (shop_ID, shop_name) VALUES ('S1', 'Other')")
+    with pytest.raises(mysql.connector.errors.DatabaseError):
+        run(backend, "SELECT missing_column FROM Shop")
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage import SQLiteBackend
+from tasks import TaskQueue
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteBackend(str(tmp_path / 'tasks.sqlite3'))
+
+
+@pytest.fixture
+def task_queue(backend):
+    # Workers are not started; the tests run queued tasks and polls by hand
+    return TaskQueue(backend.connect, workers=0, max_queue=10, max_attempts=2, backoff=0)
+
+
+def add(backend, task_queue, event, payload):
+    connection = backend.connect()
+    cursor = connection.cursor()
+    tasks = task_queue.add_to_outbox(cursor, event, payload)
+    connection.commit()
+    connection.close()
+    return tasks
+
+
+def outbox(backend):
+    connection = backend.connect()
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SELECT task_id, status, attempts, lease_id, last_error FROM Task_Outbox")
+    rows = cursor.fetchall()
+    connection.close()
+    return rows
+
+
+def expire_leases(backend):
+    connection = backend.connect()
+    connection.cursor().execute("UPDATE Task_Outbox SET claimed_until = %s", (datetime.now() - timedelta(seconds=1),))
+    connection.commit()
+    connection.close()
+
+
+def work_one(task_queue):
+    task_queue._process(task_queue._queue.get_nowait())
+
+
+def test_hook_runs_and_row_is_deleted(backend, task_queue):
+    calls = []
+    task_queue.register('order_placed')(calls.append)
+    task_queue.dispatch(add(backend, task_queue, 'order_placed', {'order_id': 'O1'}))
+    work_one(task_queue)
+    assert calls == [{'order_id': 'O1'}]
+    assert outbox(backend) == []
+    assert task_queue.stats['completed'] == 1
+
+
+def test_no_outbox_rows_without_hooks(backend, task_queue):
+    assert add(backend, task_queue, 'order_placed', {}) == []
+    assert outbox(backend) == []
+
+
+def test_failures_are_retried_then_marked_failed(backend, task_queue):
+    def broken(payload):
+        raise RuntimeError('boom')
+    task_queue.register('order_placed')(broken)
+    task_queue.dispatch(add(backend, task_queue, 'order_placed', {}))
+
+    work_one(task_queue)
+    [row] = outbox(backend)
+    assert (row['status'], row['attempts'], row['lease_id']) == ('Pending', 1, None)
+
+    task_queue._claim_due_tasks()
+    work_one(task_queue)
+    [row] = outbox(backend)
+    assert (row['status'], row['attempts'], row['last_error']) == ('Failed', 2, 'RuntimeError: boom')
+    task_queue._claim_due_tasks()
+    assert task_queue._queue.empty()
+
+
+def test_task_reclaimed_while_queued_runs_once(backend, task_queue):
+    calls = []
+    task_queue.register('order_placed')(calls.append)
+    task_queue.dispatch(add(backend, task_queue, 'order_placed', {'order_id': 'O1'}))
+
+    # The task waited in the queue past its lease and the poller claimed it again
+    expire_leases(backend)
+    task_queue._claim_due_tasks()
+    assert task_queue._queue.qsize() == 2
+
+    work_one(task_queue)
+    work_one(task_queue)
+    assert calls == [{'order_id': 'O1'}]
+    assert task_queue.stats['stale'] == 1
+    assert outbox(backend) == []
+
+
+def test_overflowed_tasks_are_left_for_the_poller(backend):
+    task_queue = TaskQueue(backend.connect, workers=0, max_queue=1)
+    calls = []
+    task_queue.register('order_placed')(calls.append)
+    task_queue.dispatch(add(backend, task_queue, 'order_placed', {'n': 1}))
+    task_queue.dispatch(add(backend, task_queue, 'order_placed', {'n': 2}))
+    assert task_queue.stats['overflowed'] == 1
+
+    work_one(task_queue)
+    task_queue._claim_due_tasks()
+    work_one(task_queue)
+    assert sorted(call['n'] for call in calls) == [1, 2]
+    assert outbox(backend) == []
@@ -13,14 +13,45 @@ DELIMITER ;
 
 
 --Auto Check for Low Inventory
+--Keeps one Low_Stock_Alert per inventory item: it opens (with a single Notification)
+--when stock drops to the reorder level, is updated in place while stock stays low,
+--and is closed, re-arming it, once the item is restocked above the reorder level.
 DELIMITER //
 CREATE TRIGGER CheckReorderLevel
 AFTER UPDATE ON Inventory
 FOR EACH ROW
 BEGIN
-    IF NEW.quantity <= NEW.reorder_level THEN
+    IF NEW.quantity <= NEW.reorder_level AND OLD.quantity > OLD.reorder_level THEN
+        INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+        VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+        ON DUPLICATE KEY UPDATE
+            item_name = NEW.item_name,
+            quantity = NEW.quantity,
+            reorder_level = NEW.reorder_level,
+            is_open = TRUE,
+            raised_at = NOW(),
+            updated_at = NOW(),
+            resolved_at = NULL;
         INSERT INTO Notification (notification_id, message, generated_at, is_read)
-        VALUES (CONCAT('N', UUID()), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+        VALUES (CONCAT('N', LEFT(REPLACE(UUID(), '-', ''), 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+    ELSEIF NEW.quantity <= NEW.reorder_level THEN
+        IF NEW.quantity <> OLD.quantity OR NEW.reorder_level <> OLD.reorder_level THEN
+            INSERT INTO Low_Stock_Alert (inventory_id, item_name, quantity, reorder_level, is_open, raised_at, updated_at, resolved_at)
+            VALUES (NEW.inventory_id, NEW.item_name, NEW.quantity, NEW.reorder_level, TRUE, NOW(), NOW(), NULL)
+            ON DUPLICATE KEY UPDATE
+                quantity = NEW.quantity,
+                reorder_level = NEW.reorder_level,
+                updated_at = NOW();
+            -- ROW_COUNT() is 1 only when the item had no alert yet (stock was loaded already low)
+            IF ROW_COUNT() = 1 THEN
+                INSERT INTO Notification (notification_id, message, generated_at, is_read)
+                VALUES (CONCAT('N', LEFT(REPLACE(UUID(), '-', ''), 19)), CONCAT('Reorder needed for ', NEW.item_name), NOW(), FALSE);
+            END IF;
+        END IF;
+    ELSEIF OLD.quantity <= OLD.reorder_level THEN
+        UPDATE Low_Stock_Alert
+        SET quantity = NEW.quantity, is_open = FALSE, updated_at = NOW(), resolved_at = NOW()
+        WHERE inventory_id = NEW.inventory_id AND is_open = TRUE;
     END IF;
 END //
 DELIMITER ;